@@ -24,7 +24,7 @@ class MarketingAnalysisAgents:
 				online business landscapes."""),
 			tools=[
 					BrowserTools.scrape_and_summarize_website,
-					SearchTools.search_internet
+					SearchTools.search_internet, SearchTools.search_internet_batch
 			],
 			allow_delegation=False,
 			llm=self.llm,
@@ -43,7 +43,7 @@ class MarketingAnalysisAgents:
 				bespoke strategies that drive success."""),
 			tools=[
 					BrowserTools.scrape_and_summarize_website,
-					SearchTools.search_internet,
+					SearchTools.search_internet, SearchTools.search_internet_batch,
 					SearchTools.search_instagram
 			],
 			llm=self.llm,
@@ -66,7 +66,7 @@ class MarketingAnalysisAgents:
 				attention and inspire action."""),
 			tools=[
 					BrowserTools.scrape_and_summarize_website,
-					SearchTools.search_internet,
+					SearchTools.search_internet, SearchTools.search_internet_batch,
 					SearchTools.search_instagram
 			],
 			llm=self.llm,
@@ -86,7 +86,7 @@ class MarketingAnalysisAgents:
 					important customer and you need to take the most amazing photograph."""),
 				tools=[
 					BrowserTools.scrape_and_summarize_website,
-					SearchTools.search_internet,
+					SearchTools.search_internet, SearchTools.search_internet_batch,
 					SearchTools.search_instagram
 				],
 				llm=self.llm,
@@ -109,7 +109,7 @@ class MarketingAnalysisAgents:
 					content for the customer."""),
 				tools=[
 					BrowserTools.scrape_and_summarize_website,
-					SearchTools.search_internet,
+					SearchTools.search_internet, SearchTools.search_internet_batch,
 					SearchTools.search_instagram
 				],
 				llm=self.llm,
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0 Safari/537.36")
+MIN_TEXT_LENGTH = 500
+
+SCRIPT_OR_STYLE = re.compile(
+    r"<(script|style|noscript)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+TAG = re.compile(r"<[^>]+>")
+SCRIPT_TAG = re.compile(r"<script\b", re.IGNORECASE)
+EMPTY_APP_ROOT = re.compile(
+    r"<div[^>]+id=[\"'](root|app|__next|__nuxt)[\"'][^>]*>\s*</div>", re.IGNORECASE)
+JAVASCRIPT_REQUIRED = re.compile(
+    r"(enable|requires?) javascript|javascript (is )?(disabled|required)",
+    re.IGNORECASE)
+
+
+def needs_javascript(html):
+  """Heuristic for pages that only show their content once scripts run: an empty SPA
+  root element, a "please enable JavaScript" notice, or barely any text next to
+  scripts."""
+  if EMPTY_APP_ROOT.search(html):
+    return True
+  without_scripts = SCRIPT_OR_STYLE.sub(" ", html)
+  text = " ".join(TAG.sub(" ", without_scripts).split())
+  if len(text) >= MIN_TEXT_LENGTH:
+    return False
+  return bool(SCRIPT_TAG.search(html) or JAVASCRIPT_REQUIRED.search(html))
+
+
+class NotHtmlError(RuntimeError):
+  """The page is a PDF, JSON, an image or other content the extractor can't read."""
+
+
+class Renderer(ABC):
+  """Renders a page in a headless browser and returns the resulting HTML."""
+  name = "renderer"
+
+  @abstractmethod
+  def render(self, url):
+    ...
+
+
+class BrowserlessRenderer(Renderer):
+  """
+  Renders through a browserless /content endpoint, chrome.browserless.io by default.
+  Point BROWSERLESS_URL at a local browserless container, or at a stub server in
+  tests, to skip the round trip to the hosted service.
+  """
+  name = "browserless"
+
+  def __init__(self, endpoint=None, token=None, timeout=60):
+    self.endpoint = endpoint or os.environ.get(
+        "BROWSERLESS_URL", "https://chrome.browserless.io/content")
+    if token is None:
+      token = os.environ.get("BROWSERLESS_API_KEY")
+    self.token = token
+    self.timeout = timeout
+    self.session = requests.Session()
+
+  def render(self, url):
+    params = {"token": self.token} if self.token else {}
+    response = self.session.post(
+        self.endpoint,
+        params=params,
+        headers={'cache-control': 'no-cache', 'content-type': 'application/json'},
+        data=json.dumps({"url": url}),
+        timeout=self.timeout)
+    response.raise_for_status()
+    return response.text
+
+
+class PlaywrightRenderer(Renderer):
+  """Renders with a local headless Chromium, needs `pip install playwright` and
+  `playwright install chromium`. Runs one browser per render call."""
+  name = "playwright"
+
+  def __init__(self, timeout=30):
+    self.timeout = timeout
+
+  def render(self, url):
+    try:
+      from playwright.sync_api import sync_playwright
+    except ImportError as e:
+      raise RuntimeError(
+          "The playwright renderer needs `pip install playwright` and "
+          "`playwright install chromium`") from e
+    with sync_playwright() as playwright:
+      browser = playwright.chromium.launch()
+      try:
+        page = browser.new_page(user_agent=USER_AGENT)
+        page.goto(url, wait_until="networkidle", timeout=self.timeout * 1000)
+        return page.content()
+      finally:
+        browser.close()
+
+
+RENDERERS = {"browserless": BrowserlessRenderer, "playwright": PlaywrightRenderer}
+
+
+class FetchEngine():
+  """
+  Tiered page fetching: a plain GET over a pooled session first, and only pages that
+  fail or look like they need JavaScript are escalated to the renderer. Responses that
+  aren't HTML raise NotHtmlError. Time spent in every tier is recorded, `report()`
+  summarizes it.
+  """
+
+  def __init__(self, renderer, timeout=15, pool_size=16):
+    self.renderer = renderer
+    self.timeout = timeout
+    self.session = requests.Session()
+    self.session.headers.update({"User-Agent": USER_AGENT})
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+    self.stats = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    self._lock = threading.Lock()
+
+  def fetch(self, url):
+    if "://" not in url:
+      url = f"https://{url}"
+    timings = []
+    started_at = time.perf_counter()
+    try:
+      response = self.session.get(url, timeout=self.timeout)
+    except requests.exceptions.RequestException:
+      response = None
+    timings.append(self._record("http", started_at))
+
+    if response is not None and response.ok:
+      # A missing content type is taken for HTML, the renderer couldn't do better
+      content_type = response.headers.get("content-type", "text/html")
+      if "html" not in content_type:
+        raise NotHtmlError(f"it is {content_type.split(';')[0]}, not an HTML page")
+    if response is not None and response.ok and not needs_javascript(response.text):
+      html = response.text
+    else:
+      started_at = time.perf_counter()
+      try:
+        html = self.renderer.render(url)
+      finally:
+        timings.append(self._record(self.renderer.name, started_at))
+    tiers = " -> ".join(f"{tier} {seconds:.2f}s" for tier, seconds in timings)
+    print(f"Fetched {url}: {tiers}")
+    return html
+
+  def report(self):
+    with self._lock:
+      return "\n".join(
+          f"{tier}: {stats['count']} fetches, {stats['seconds']:.2f}s total, "
+          f"{stats['seconds'] / stats['count']:.2f}s average"
+          for tier, stats in self.stats.items())
+
+  def _record(self, tier, started_at):
+    seconds = time.perf_counter() - started_at
+    with self._lock:
+      self.stats[tier]["count"] += 1
+      self.stats[tier]["seconds"] += seconds
+    return tier, seconds
+
+
+fetch_engine = FetchEngine(
+    RENDERERS[os.environ.get("BROWSER_RENDERER", "browserless")]())
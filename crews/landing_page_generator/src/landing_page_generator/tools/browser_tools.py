@@ -1,10 +1,101 @@
-import json
+import atexit
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from crewai import Agent, Task
 from langchain.tools import tool
-from unstructured.partition.html import partition_html
+from tools.content_extractor import extract_main_content
+from tools.fetch_engine import fetch_engine
+from tools.scrape_cache import scrape_cache
+from tools.text_chunker import CHUNK_TOKENS, chunk_spans, count_tokens
+
+MAX_SUMMARY_WORKERS = int(os.environ.get("BROWSER_SUMMARY_WORKERS", 4))
+_local = threading.local()
+
+
+def summarizer_agent():
+  # An Agent resets its executor, task and messages on every execute, so concurrent
+  # chunks can't share one. Each summary worker thread builds its own and reuses it.
+  agent = getattr(_local, "summarizer_agent", None)
+  if agent is None:
+    agent = _local.summarizer_agent = Agent(
+        role='Principal Researcher',
+        goal=
+        'Do amazing researches and summaries based on the content you are working with',
+        backstory=
+        "You're a Principal Researcher at a big company and you need to do a research about a given topic.",
+        allow_delegation=False)
+  return agent
+
+
+def summarize_chunk(website, chunk):
+  summary = scrape_cache.get_summary(website, chunk)
+  if summary is not None:
+    return summary
+  task = Task(
+      agent=summarizer_agent(),
+      description=
+      f'Analyze and summarize the content bellow, make sure to include the most relevant information in the summary, return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}'
+  )
+  summary = task.execute()
+  scrape_cache.put_summary(website, chunk, summary)
+  return summary
+
+
+def merge_summaries(website, summaries):
+  if len(summaries) == 1:
+    return summaries[0]
+  merged = "\n\n".join(summaries)
+  summary = scrape_cache.get_summary(website, merged)
+  if summary is not None:
+    return summary
+  task = Task(
+      agent=summarizer_agent(),
+      description=
+      'Merge the summaries bellow into a single summary, keep all the '
+      'relevant information and drop repetitions, return only the summary '
+      'nothing else.\n\nSUMMARIES\n----------\n' + merged
+  )
+  summary = task.execute()
+  scrape_cache.put_summary(website, merged, summary)
+  return summary
+
+
+def summarize_chunks(website, content):
+  """Map: summarize every token-sized chunk of the content concurrently. Reduce: merge
+  the summaries in groups that fit a chunk, level by level, until a single summary is
+  left. Every step is cached per page, summarizing a page again costs no LLM calls."""
+  # Chunks are offsets into the content, each is sliced only when its task is built
+  spans = chunk_spans(content)
+  with ThreadPoolExecutor(MAX_SUMMARY_WORKERS) as pool:
+    summaries = list(pool.map(
+        lambda span: summarize_chunk(website, content[span[0]:span[1]]), spans))
+    # merge_summaries joins a group with blank lines, they count towards the chunk too
+    joiner_tokens = count_tokens("\n\n")
+    while len(summaries) > 1:
+      groups = [[]]
+      group_tokens = 0
+      for summary in summaries:
+        tokens = count_tokens(summary)
+        joiner = joiner_tokens if groups[-1] else 0
+        if len(groups[-1]) >= 2 and group_tokens + joiner + tokens > CHUNK_TOKENS:
+          groups.append([])
+          group_tokens = joiner = 0
+        groups[-1].append(summary)
+        group_tokens += joiner + tokens
+      summaries = list(pool.map(lambda group: merge_summaries(website, group), groups))
+  return summaries[0] if summaries else ""
+
+
+def print_fetch_report():
+  if fetch_engine.stats:
+    print(f"Page fetch latency per tier:\n{fetch_engine.report()}")
+
+
+# Where page fetching spent its time over the whole run, printed once the crew is done
+atexit.register(print_fetch_report)
 
 
 class BrowserTools():
@@ -12,27 +103,14 @@ class BrowserTools():
   @tool("Scrape website content")
   def scrape_and_summarize_website(website):
     """Useful to scrape and summarize a website content"""
-    url = f"https://chrome.browserless.io/content?token={os.environ['BROWSERLESS_API_KEY']}"
-    payload = json.dumps({"url": website})
-    headers = {'cache-control': 'no-cache', 'content-type': 'application/json'}
-    response = requests.request("POST", url, headers=headers, data=payload)
-    elements = partition_html(text=response.text)
-    content = "\n\n".join([str(el) for el in elements])
-    content = [content[i:i + 8000] for i in range(0, len(content), 8000)]
-    summaries = []
-    for chunk in content:
-      agent = Agent(
-          role='Principal Researcher',
-          goal=
-          'Do amazing researches and summaries based on the content you are working with',
-          backstory=
-          "You're a Principal Researcher at a big company and you need to do a research about a given topic.",
-          allow_delegation=False)
-      task = Task(
-          agent=agent,
-          description=
-          f'Analyze and summarize the content bellow, make sure to include the most relevant information in the summary, return only the summary nothing else.\n\nCONTENT\n----------\n{chunk}'
-      )
-      summary = task.execute()
-      summaries.append(summary)
-    return "\n\n".join(summaries)
+    html = scrape_cache.get_html(website)
+    if html is None:
+      # Plain HTTP first, only pages that need JavaScript go to the headless renderer
+      try:
+        html = fetch_engine.fetch(website)
+      except (requests.exceptions.RequestException, RuntimeError) as e:
+        return f"Could not fetch {website}: {e}"
+      scrape_cache.put_html(website, html)
+    # Only the page's main content is summarized, within a token budget
+    content = extract_main_content(website, html)
+    return summarize_chunks(website, content)
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+  """Same page, same key: lowercase scheme and host, no default port, fragment,
+  tracking parameters or trailing slash, and sorted query parameters."""
+  url = url.strip()
+  if "://" not in url:
+    url = f"https://{url}"
+  parts = urlsplit(url)
+  scheme = parts.scheme.lower()
+  host = (parts.hostname or "").lower()
+  if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+    host = f"{host}:{parts.port}"
+  path = parts.path.rstrip("/") or "/"
+  query = sorted(
+      (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+      if not key.lower().startswith("utm_"))
+  return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_key(text):
+  return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ScrapeCache():
+  """
+  In-process cache of scraped pages, so agents of a crew browsing the same site
+  reuse each other's work. Per normalized URL it keeps the raw HTML and the summaries
+  of the page's chunks (and merge steps) keyed by the hash of their input.
+
+  Entries expire `ttl` seconds after the page was fetched, and the least recently
+  used pages are evicted once the cache holds more than `max_bytes` of text.
+  """
+
+  def __init__(self, ttl=3600, max_bytes=64 * 1024 * 1024):
+    self.ttl = ttl
+    self.max_bytes = max_bytes
+    self.size = 0
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get_html(self, url):
+    with self._lock:
+      entry = self._entry(url)
+      return None if entry is None else entry["html"]
+
+  def put_html(self, url, html):
+    with self._lock:
+      key = normalize_url(url)
+      self._remove(key)
+      self._entries[key] = {
+          "html": html,
+          "summaries": {},
+          "fetched_at": time.monotonic(),
+          "size": len(html),
+      }
+      self.size += len(html)
+      self._evict()
+
+  def get_summary(self, url, text):
+    with self._lock:
+      entry = self._entry(url)
+      return None if entry is None else entry["summaries"].get(content_key(text))
+
+  def put_summary(self, url, text, summary):
+    summary = str(summary)
+    with self._lock:
+      entry = self._entry(url)
+      if entry is None:
+        return
+      entry["summaries"][content_key(text)] = summary
+      entry["size"] += len(summary)
+      self.size += len(summary)
+      self._evict()
+
+  def _entry(self, url):
+    key = normalize_url(url)
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    if time.monotonic() - entry["fetched_at"] > self.ttl:
+      self._remove(key)
+      return None
+    self._entries.move_to_end(key)
+    return entry
+
+  def _remove(self, key):
+    entry = self._entries.pop(key, None)
+    if entry is not None:
+      self.size -= entry["size"]
+
+  def _evict(self):
+    while self.size > self.max_bytes and self._entries:
+      self._remove(next(iter(self._entries)))
+
+
+scrape_cache = ScrapeCache(
+    ttl=float(os.environ.get("SCRAPE_CACHE_TTL", 3600)),
+    max_bytes=int(float(os.environ.get("SCRAPE_CACHE_MAX_MB", 64)) * 1024 * 1024))
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def normalize_query(query):
+  """Cache key of a search, case and extra whitespace don't matter. Only used as a key,
+  serper gets the query as it was written."""
+  return " ".join(str(query).split()).casefold()
+
+
+class SearchClient():
+  """
+  Serper client on a pooled session. Responses are cached in memory and on disk for
+  `ttl` seconds per normalized query, and a query already in flight on another thread
+  is waited for instead of sent again.
+
+  SERPER_URL points the client at another server, like a local fake serper in tests.
+  """
+
+  def __init__(self, url, cache_dir, ttl=86400, max_memory_entries=1024, pool_size=16):
+    self.url = url
+    self.cache_dir = cache_dir
+    self.ttl = ttl
+    self.max_memory_entries = max_memory_entries
+    self.session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+    self._memory = OrderedDict()
+    self._in_flight = {}
+    self._lock = threading.Lock()
+
+  def search(self, query, **params):
+    """The parsed serper response for `query`, extra params (like num) go in the
+    payload."""
+    payload = {"q": str(query).strip(), **params}
+    key_payload = {**payload, "q": normalize_query(query)}
+    key = hashlib.sha256(
+        json.dumps(key_payload, sort_keys=True).encode("utf-8")).hexdigest()
+    with self._lock:
+      data = self._get_memory(key)
+      if data is not None:
+        return data
+      future = self._in_flight.get(key)
+      is_owner = future is None
+      if is_owner:
+        future = self._in_flight[key] = Future()
+    if not is_owner:
+      return future.result()
+
+    try:
+      entry = self._read_disk(key)
+      if entry is None:
+        fetched_at, data = time.time(), self._fetch(payload)
+        # Errors, like an invalid api key, are returned but not cached
+        if "organic" in data:
+          self._write_disk(key, payload, fetched_at, data)
+      else:
+        fetched_at, data = entry
+      if "organic" in data:
+        with self._lock:
+          self._put_memory(key, fetched_at, data)
+      future.set_result(data)
+      return data
+    except Exception as e:
+      future.set_exception(e)
+      raise
+    finally:
+      with self._lock:
+        self._in_flight.pop(key, None)
+
+  def _fetch(self, payload):
+    headers = {
+        'X-API-KEY': os.environ['SERPER_API_KEY'],
+        'content-type': 'application/json'
+    }
+    response = self.session.post(
+        self.url, headers=headers, data=json.dumps(payload), timeout=30)
+    return response.json()
+
+  def _get_memory(self, key):
+    entry = self._memory.get(key)
+    if entry is None:
+      return None
+    if time.time() - entry[0] > self.ttl:
+      del self._memory[key]
+      return None
+    self._memory.move_to_end(key)
+    return entry[1]
+
+  def _put_memory(self, key, fetched_at, data):
+    self._memory[key] = (fetched_at, data)
+    self._memory.move_to_end(key)
+    while len(self._memory) > self.max_memory_entries:
+      self._memory.popitem(last=False)
+
+  def _path(self, key):
+    return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+  def _read_disk(self, key):
+    try:
+      with open(self._path(key)) as file:
+        entry = json.load(file)
+    except (OSError, ValueError):
+      return None
+    if time.time() - entry["fetched_at"] > self.ttl:
+      return None
+    return entry["fetched_at"], entry["response"]
+
+  def _write_disk(self, key, payload, fetched_at, data):
+    path = self._path(key)
+    try:
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      temporary_path = f"{path}.{threading.get_ident()}.tmp"
+      with open(temporary_path, "w") as file:
+        json.dump(
+            {"request": payload, "fetched_at": fetched_at, "response": data}, file)
+      os.replace(temporary_path, path)
+    except OSError as e:
+      print(f"Error caching search results: {e}")
+
+
+search_client = SearchClient(
+    url=os.environ.get("SERPER_URL", "https://google.serper.dev/search"),
+    cache_dir=os.environ.get("SEARCH_CACHE_DIR", os.path.join("db", "search_cache")),
+    ttl=float(os.environ.get("SEARCH_CACHE_TTL", 86400)))
@@ -1,7 +1,5 @@
-import os
-import json
-import requests
 from langchain.tools import tool
+from tools.search_client import search_client
 
 
 class SearchTools():
@@ -10,14 +8,9 @@ class SearchTools():
   def search_internet(query):
     """Useful to search the internet 
     about a a given topic and return relevant results"""
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({"q": query})
-    headers = {
-        'X-API-KEY': os.environ['SERPER_API_KEY'],
-        'content-type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
-    results = response.json()['organic']
+    # Pooled, cached and deduplicated with concurrent identical searches
+    data = search_client.search(query)
+    results = data.get('organic', [])
     string = []
     for result in results:
       string.append('\n'.join([
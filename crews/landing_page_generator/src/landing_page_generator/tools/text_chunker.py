@@ -0,0 +1,142 @@
+import os
+import re
+from functools import lru_cache
+
+CHUNK_TOKENS = int(os.environ.get("BROWSER_CHUNK_TOKENS", 2000))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("BROWSER_CHUNK_OVERLAP_TOKENS", 100))
+
+# From coarse to fine: paragraphs, lines, sentences, words
+SEPARATORS = (
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?])\s+"),
+    re.compile(r"\s+"),
+)
+HEADING = re.compile(r"#{1,6} ")
+
+
+def estimate_tokens(text):
+  # Around four characters per token for English text
+  return (len(text) + 3) // 4
+
+
+@lru_cache(maxsize=None)
+def token_counter(model=None):
+  """
+  Counts tokens with the tiktoken encoding of `model`, cl100k_base for models tiktoken
+  doesn't know (like local Ollama models). Without tiktoken, or when its encoding can't
+  be downloaded, tokens are estimated from the length of the text.
+  """
+  try:
+    import tiktoken
+  except ImportError:
+    return estimate_tokens
+  try:
+    try:
+      if model:
+        encoding = tiktoken.encoding_for_model(model)
+      else:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except KeyError:
+      encoding = tiktoken.get_encoding("cl100k_base")
+  except Exception as e:
+    print(f"Estimating token counts, tiktoken encoding unavailable: {e}")
+    return estimate_tokens
+  return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def count_tokens(text):
+  model = os.environ.get("OPENAI_MODEL_NAME") or os.environ.get("MODEL")
+  return token_counter(model)(text)
+
+
+def split_spans(text, start, end, max_tokens, count=count_tokens, level=0):
+  """
+  Yields (start, end, tokens) pieces of text[start:end] of at most `max_tokens` tokens,
+  split at the coarsest separator that gets them under the limit. Only offsets are
+  passed around, the regexes search the original string in place.
+  """
+  tokens = count(text[start:end])
+  if tokens <= max_tokens:
+    yield start, end, tokens
+    return
+  if level == len(SEPARATORS):
+    # A single "word" longer than a chunk, like an inlined data URL, is cut anywhere
+    step = max(max_tokens * (end - start) // tokens, 1)
+    for position in range(start, end, step):
+      yield position, min(position + step, end), count(text[position:position + step])
+    return
+  position = start
+  for match in SEPARATORS[level].finditer(text, start, end):
+    if match.start() > position:
+      yield from split_spans(
+          text, position, match.start(), max_tokens, count, level + 1)
+    position = match.end()
+  if end > position:
+    yield from split_spans(text, position, end, max_tokens, count, level + 1)
+
+
+def overlap_start(text, start, end, overlap_tokens, count=count_tokens):
+  """Where the last `overlap_tokens` tokens of text[start:end] begin, moved forward to
+  the next sentence, or else word, boundary. `end` when there's no room for an
+  overlap."""
+  tokens = count(text[start:end])
+  if overlap_tokens <= 0 or tokens <= overlap_tokens:
+    return end
+  position = end - overlap_tokens * (end - start) // tokens
+  match = (
+      SEPARATORS[2].search(text, position, end)
+      or SEPARATORS[3].search(text, position, end))
+  return match.end() if match else end
+
+
+def chunk_spans(
+    text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+    count=count_tokens):
+  """
+  Splits text into (start, end) spans of at most `max_tokens` tokens that end at
+  paragraph, line, sentence or word boundaries, separators included. A heading starts
+  a new chunk once the current one is half full and only ends a chunk when the text
+  after it doesn't fit in the same one, and within a section consecutive chunks share
+  up to `overlap_tokens` tokens, starting at a sentence boundary.
+  """
+  if not text.strip():
+    return []
+  chunks = []
+  current = []
+  # (start, tokens) of the previous chunk's tail the current chunk repeats
+  overlap = None
+  current_tokens = 0
+  for piece in split_spans(text, 0, len(text), max_tokens, count):
+    tokens = piece[2]
+    is_heading = bool(HEADING.match(text, piece[0]))
+    # The separator before the piece ends up in the chunk too
+    joiner = count(text[current[-1][1]:piece[0]]) if current else 0
+    if current and (
+        current_tokens + joiner + tokens > max_tokens
+        or (is_heading and current_tokens >= max_tokens // 2)):
+      carried = []
+      # A heading moves on to the next chunk, unless the next piece won't fit next to it
+      if (HEADING.match(text, current[-1][0]) and len(current) > 1
+          and current[-1][2] + joiner + tokens <= max_tokens):
+        carried = [current.pop()]
+      chunk = (overlap[0] if overlap else current[0][0], current[-1][1])
+      chunks.append(chunk)
+      overlap = None
+      if not carried and not is_heading:
+        position = overlap_start(text, chunk[0], chunk[1], overlap_tokens, count)
+        if position < chunk[1]:
+          overlap = (position, count(text[position:chunk[1]]))
+          if overlap[1] + joiner + tokens > max_tokens:
+            overlap = None
+      current = carried
+      current_tokens = sum(previous[2] for previous in current)
+      if overlap:
+        current_tokens += overlap[1]
+      elif not current:
+        joiner = 0
+    current.append(piece)
+    current_tokens += joiner + tokens
+  if current:
+    chunks.append((overlap[0] if overlap else current[0][0], current[-1][1]))
+  return chunks
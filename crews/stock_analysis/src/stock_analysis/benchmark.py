@@ -0,0 +1,71 @@
+import ast
+import operator
+import random
+import re
+import sys
+import time
+
+from tools.expression_evaluator import evaluate, evaluate_batch
+
+def legacy_calculate(operation: str) -> float:
+    """The per-call evaluator CalculatorTool used before: regex check, ast.parse and a recursive tree walk."""
+    allowed_operators = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Mult: operator.mul,
+        ast.Div: operator.truediv,
+        ast.Pow: operator.pow,
+        ast.Mod: operator.mod,
+        ast.USub: operator.neg,
+        ast.UAdd: operator.pos,
+    }
+    if not re.match(r'^[0-9+\-*/().% ]+$', operation):
+        raise ValueError("Invalid characters in mathematical expression")
+    tree = ast.parse(operation, mode='eval')
+
+    def _eval_node(node):
+        if isinstance(node, ast.Expression):
+            return _eval_node(node.body)
+        elif isinstance(node, ast.Constant):
+            return node.value
+        elif isinstance(node, ast.BinOp):
+            return allowed_operators[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+        elif isinstance(node, ast.UnaryOp):
+            return allowed_operators[type(node.op)](_eval_node(node.operand))
+        raise ValueError(f"Unsupported node type: {type(node).__name__}")
+
+    return _eval_node(tree)
+
+def _timed(function):
+    started_at = time.perf_counter()
+    function()
+    return time.perf_counter() - started_at
+
+def calculator():
+    """
+    Compare the legacy per-call evaluator with cached and vectorized evaluation on ratio analysis
+    style expressions, e.g. quarter over quarter growth.
+
+    Usage: python benchmark.py [number of expressions]
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    random.seed(0)
+    revenues = [round(random.uniform(1000, 5000), 2) for _ in range(count + 1)]
+    expressions = [f"({current} - {previous}) / {previous} * 100" for previous, current in zip(revenues, revenues[1:])]
+
+    legacy = _timed(lambda: [legacy_calculate(expression) for expression in expressions])
+    cached = _timed(lambda: [evaluate(expression) for expression in expressions])
+    batch = _timed(lambda: evaluate_batch(expressions))
+    array = _timed(lambda: evaluate(
+        "(current - previous) / previous * 100",
+        {"current": revenues[1:], "previous": revenues[:-1]},
+    ))
+
+    print(f"Evaluating {count} growth rates:")
+    print(f"legacy per call:              {legacy * 1000:.2f} ms")
+    print(f"compiled templates, per call: {cached * 1000:.2f} ms")
+    print(f"batch of expressions:         {batch * 1000:.2f} ms")
+    print(f"one expression, arrays:       {array * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    calculator()
@@ -4,6 +4,8 @@ from crewai.project import CrewBase, agent, crew, task
 
 from tools.calculator_tool import CalculatorTool
 from tools.sec_tools import SEC10KTool, SEC10QTool
+from tools.sec_index_tools import SECFinancialsTool, SECSectionTool
+from tools.tool_registry import ToolRegistry
 
 from crewai_tools import WebsiteSearchTool, ScrapeWebsiteTool, TXTSearchTool
 
@@ -17,6 +19,11 @@ llm = Ollama(model="llama3.1")
 class StockAnalysisCrew:
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
+
+    def __init__(self, company_stock: str = "AMZN"):
+        self.company_stock = company_stock
+        # Agents share tool instances, so each filing is fetched and embedded once per crew
+        self.tool_registry = ToolRegistry()
     
     @agent
     def financial_agent(self) -> Agent:
@@ -25,19 +32,22 @@ class StockAnalysisCrew:
             verbose=True,
             llm=llm,
             tools=[
-                ScrapeWebsiteTool(),
-                WebsiteSearchTool(),
-                CalculatorTool(),
-                SEC10QTool("AMZN"),
-                SEC10KTool("AMZN"),
+                self.tool_registry.get(ScrapeWebsiteTool),
+                self.tool_registry.get(WebsiteSearchTool),
+                self.tool_registry.get(CalculatorTool),
+                self.tool_registry.get(SEC10QTool, self.company_stock),
+                self.tool_registry.get(SEC10KTool, self.company_stock),
+                self.tool_registry.get(SECFinancialsTool, self.company_stock),
+                self.tool_registry.get(SECSectionTool, self.company_stock),
             ]
         )
     
+    # First in class order, so it stays the first task of the sequential process
     @task
     def financial_analysis(self) -> Task: 
         return Task(
             config=self.tasks_config['financial_analysis'],
-            agent=self.financial_agent(),
+            agent=self.financial_analyst_agent(),
         )
     
 
@@ -48,10 +58,12 @@ class StockAnalysisCrew:
             verbose=True,
             llm=llm,
             tools=[
-                ScrapeWebsiteTool(),
+                self.tool_registry.get(ScrapeWebsiteTool),
                 # WebsiteSearchTool(), 
-                SEC10QTool("AMZN"),
-                SEC10KTool("AMZN"),
+                self.tool_registry.get(SEC10QTool, self.company_stock),
+                self.tool_registry.get(SEC10KTool, self.company_stock),
+                self.tool_registry.get(SECFinancialsTool, self.company_stock),
+                self.tool_registry.get(SECSectionTool, self.company_stock),
             ]
         )
     
@@ -69,21 +81,14 @@ class StockAnalysisCrew:
             verbose=True,
             llm=llm,
             tools=[
-                ScrapeWebsiteTool(),
-                WebsiteSearchTool(),
-                CalculatorTool(),
-                SEC10QTool(),
-                SEC10KTool(),
+                self.tool_registry.get(ScrapeWebsiteTool),
+                self.tool_registry.get(WebsiteSearchTool),
+                self.tool_registry.get(CalculatorTool),
+                self.tool_registry.get(SEC10QTool),
+                self.tool_registry.get(SEC10KTool),
             ]
         )
     
-    @task
-    def financial_analysis(self) -> Task: 
-        return Task(
-            config=self.tasks_config['financial_analysis'],
-            agent=self.financial_analyst_agent(),
-        )
-    
     @task
     def filings_analysis(self) -> Task:
         return Task(
@@ -98,9 +103,9 @@ class StockAnalysisCrew:
             verbose=True,
             llm=llm,
             tools=[
-                ScrapeWebsiteTool(),
-                WebsiteSearchTool(),
-                CalculatorTool(),
+                self.tool_registry.get(ScrapeWebsiteTool),
+                self.tool_registry.get(WebsiteSearchTool),
+                self.tool_registry.get(CalculatorTool),
             ]
         )
 
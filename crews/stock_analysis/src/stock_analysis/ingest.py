@@ -0,0 +1,19 @@
+import sys
+from tools.filing_ingest import ingest_filings
+
+def run():
+    """
+    Fetch, parse and embed the latest filings of a watchlist before running the crew.
+
+    Usage: python ingest.py AMZN,MSFT,GOOGL [10-K,10-Q]
+    """
+    tickers = [ticker.strip().upper() for ticker in sys.argv[1].split(",")]
+    form_types = sys.argv[2].split(",") if len(sys.argv) > 2 else ["10-K", "10-Q"]
+    ingested = ingest_filings(tickers, form_types)
+    failed = [f"{ticker} {form_type}" for (ticker, form_type), ok in ingested.items() if not ok]
+    print(f"Ingested {len(ingested) - len(failed)} of {len(ingested)} filings")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+
+if __name__ == "__main__":
+    run()
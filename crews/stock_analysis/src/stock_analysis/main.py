@@ -6,7 +6,7 @@ def run():
         'query': 'What is the company you want to analyze?',
         'company_stock': 'AMZN',
     }
-    return StockAnalysisCrew().crew().kickoff(inputs=inputs)
+    return StockAnalysisCrew(inputs['company_stock']).crew().kickoff(inputs=inputs)
 
 def train():
     """
@@ -17,7 +17,7 @@ def train():
         'company_stock': 'AMZN',
     }
     try:
-        StockAnalysisCrew().crew().train(n_iterations=int(sys.argv[1]), inputs=inputs)
+        StockAnalysisCrew(inputs['company_stock']).crew().train(n_iterations=int(sys.argv[1]), inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -0,0 +1,211 @@
+import ast
+import functools
+import math
+import operator
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Number = Union[int, float]
+Variables = Dict[str, Union[Number, Sequence[Number]]]
+
+ALLOWED_CHARACTERS = re.compile(r'^[0-9a-zA-Z_+\-*/().% ]+$')
+NUMBER = re.compile(r'(?<![\w.])(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+PRIVATE_NAME = re.compile(r'\b_')
+# Numbers are lifted out as names, so templates have no ast.Constant
+# (which would also allow True or None)
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Name, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.USub, ast.UAdd,
+)
+# Constants are lifted out of expressions into these names,
+# user variables can't start with "_"
+CONSTANT_PREFIX = "_c"
+POW_FUNCTION = "_pow"
+
+# Cost limits, checked before any work that could grow with them
+MAX_EXPRESSION_LENGTH = 2000
+MAX_NODES = 500
+MAX_RESULT_BITS = 4096
+
+
+def guarded_pow(base: Any, exponent: Any) -> Any:
+    """
+    `base ** exponent` that refuses integer powers with more than MAX_RESULT_BITS bits,
+    so `9**9**9` fails at once instead of computing a number with hundreds of millions
+    of digits. Float powers overflow on their own and float arrays are bounded by their
+    type, arrays of Python ints are checked element by element.
+    """
+    if any(
+        isinstance(value, np.ndarray) and value.dtype == object
+        for value in (base, exponent)
+    ):
+        return np.frompyfunc(guarded_pow, 2, 1)(base, exponent)
+    if (
+        isinstance(base, int)
+        and isinstance(exponent, int)
+        and exponent > 0
+        and abs(base) > 1
+        and exponent * math.log2(abs(base)) > MAX_RESULT_BITS
+    ):
+        raise ValueError("Exponent too large")
+    return operator.pow(base, exponent)
+
+
+class PowToCall(ast.NodeTransformer):
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.op, ast.Pow):
+            return node
+        call = ast.Call(
+            func=ast.Name(id=POW_FUNCTION, ctx=ast.Load()),
+            args=[node.left, node.right],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+
+class CompiledExpression:
+    """
+    A validated expression compiled to Python bytecode, it works on numbers and NumPy
+    arrays alike.
+    """
+
+    def __init__(self, tree: ast.Expression):
+        tree = ast.fix_missing_locations(PowToCall().visit(tree))
+        self.code = compile(tree, "<calculator>", "eval")
+
+    def evaluate(self, env: Dict[str, Any], vectorized: bool = False) -> Any:
+        evaluation_globals = {"__builtins__": {}, POW_FUNCTION: guarded_pow}
+        try:
+            if not vectorized:
+                return eval(self.code, evaluation_globals, env)
+            with np.errstate(divide="raise", invalid="raise", over="raise"):
+                return eval(self.code, evaluation_globals, env)
+        except NameError as e:
+            raise ValueError(f"Unknown variable: {e.name}") from None
+
+
+@functools.lru_cache(maxsize=4096)
+def split_constants(expression: str) -> Tuple[str, Tuple[Number, ...]]:
+    """
+    Splits an expression into a template and its constants, "200*7" and "300*9" share
+    the template "_c0*_c1". Only templates are parsed and compiled, so a new expression
+    of a known shape costs a regex substitution, and a batch of them is one vectorized
+    evaluation.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    if not ALLOWED_CHARACTERS.match(expression):
+        raise ValueError("Invalid characters in mathematical expression")
+    if PRIVATE_NAME.search(expression):
+        raise ValueError("Variable names can't start with an underscore")
+    constants = []
+
+    def to_name(match):
+        text = match.group()
+        constants.append(float(text) if any(c in text for c in ".eE") else int(text))
+        return f"{CONSTANT_PREFIX}{len(constants) - 1}"
+
+    return NUMBER.sub(to_name, expression), tuple(constants)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledExpression:
+    tree = ast.parse(template, mode='eval')
+    for count, node in enumerate(ast.walk(tree)):
+        if count >= MAX_NODES:
+            raise ValueError(f"Expression has more than {MAX_NODES} nodes")
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported node type: {type(node).__name__}")
+    return CompiledExpression(tree)
+
+
+def constant_env(constants: Sequence[Any]) -> Dict[str, Any]:
+    return {
+        f"{CONSTANT_PREFIX}{position}": value
+        for position, value in enumerate(constants)
+    }
+
+
+def to_env(variables: Optional[Variables]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Variables as evaluation names, lists become float arrays. Also returns whether
+    any is an array.
+    """
+    env = {}
+    has_arrays = False
+    for name, value in (variables or {}).items():
+        if isinstance(value, (list, tuple, np.ndarray)):
+            env[name] = np.asarray(value, dtype=float)
+            has_arrays = True
+        else:
+            env[name] = value
+    return env, has_arrays
+
+
+def to_python(value: Any) -> Any:
+    return value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+
+
+def evaluate(expression: str, variables: Optional[Variables] = None) -> Any:
+    """Evaluates one expression, list valued variables make the result a list."""
+    env, has_arrays = to_env(variables)
+    template, constants = split_constants(expression)
+    compiled = compile_template(template)
+    env.update(constant_env(constants))
+    return to_python(compiled.evaluate(env, vectorized=has_arrays))
+
+
+def evaluate_batch(
+    expressions: List[str], variables: Optional[Variables] = None
+) -> List[Any]:
+    """
+    Evaluates many expressions, expressions with the same shape run as one vectorized
+    NumPy evaluation. An expression that fails gets its error message instead of a
+    result.
+    """
+    env, has_arrays = to_env(variables)
+    results: List[Any] = [None] * len(expressions)
+    groups = defaultdict(list)
+    for index, expression in enumerate(expressions):
+        try:
+            template, constants = split_constants(expression)
+            compile_template(template)
+        except (SyntaxError, ValueError) as e:
+            results[index] = f"Calculation error: {e}"
+            continue
+        # Integer only expressions keep Python ints, "200*7" is 1400 like in evaluate()
+        is_integer = not has_arrays and all(type(c) is int for c in constants)
+        groups[(template, is_integer)].append((index, constants))
+
+    for (template, is_integer), members in groups.items():
+        # One row per expression, array variables broadcast along the second axis
+        constants = np.array(
+            [constants for _, constants in members],
+            dtype=object if is_integer else float,
+        ).reshape(len(members), -1)
+        group_env = dict(env)
+        group_env.update(constant_env([
+            constants[:, position:position + 1]
+            for position in range(constants.shape[1])
+        ]))
+        try:
+            values = compile_template(template).evaluate(group_env, vectorized=True)
+        except (ValueError, ArithmeticError, TypeError):
+            # Evaluate one by one so only the failing expressions report an error
+            for index, _ in members:
+                try:
+                    results[index] = evaluate(expressions[index], variables)
+                except (ValueError, ArithmeticError, TypeError) as e:
+                    results[index] = f"Calculation error: {e}"
+            continue
+        width = np.shape(values)[-1] if np.ndim(values) else 1
+        values = np.broadcast_to(values, (len(members), width))
+        for row, (index, _) in enumerate(members):
+            results[index] = (
+                values[row].tolist() if has_arrays else to_python(values[row][0])
+            )
+    return results
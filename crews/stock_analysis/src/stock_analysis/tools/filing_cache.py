@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class FilingCache:
+    """
+    Content-addressed on-disk cache for SEC filings.
+
+    Layout under `root`:
+        objects/<sha256>                       raw HTML, section chunk (JSONL) and
+                                               financial table blobs
+        embedded/<sha256>                      marker for text already in the vector store
+                                               with a filing's ticker, form and accession
+        filings/<ticker>/<form>/<accession>.json
+                                               filing metadata, the hashes of its blobs
+                                               and the byte offsets of every section
+        latest/<ticker>/<form>.json            latest known accession number and when
+                                               it was last checked
+        validators/<cik>/<form>.json           ETag / Last-Modified of the company's EDGAR
+                                               submissions the last time they were read
+
+    The latest accession is trusted for `ttl` seconds; after that it is revalidated
+    with a conditional request, and if the accession did not change every cached
+    artifact is reused.
+    Embeddings live in the RAG tool's persistent vector store, the cache only records
+    which text has already been embedded so it is never added twice.
+    """
+
+    def __init__(self, root: Path, ttl: float = 24 * 60 * 60):
+        self.root = Path(root)
+        self.ttl = ttl
+
+    def latest_accession(self, ticker: str, form_type: str) -> Optional[str]:
+        """Latest known accession number, or None if it is unknown or older than the TTL."""
+        record = self._read_json(self._latest_path(ticker, form_type))
+        if record is None or time.time() - record["checked_at"] > self.ttl:
+            return None
+        return record["accession_number"]
+
+    def previous_accession(self, ticker: str, form_type: str) -> Optional[str]:
+        """Last accession number seen, however long ago it was checked."""
+        record = self._read_json(self._latest_path(ticker, form_type))
+        return None if record is None else record["accession_number"]
+
+    def set_latest_accession(self, ticker: str, form_type: str, accession_number: str):
+        self._write_json(
+            self._latest_path(ticker, form_type),
+            {"accession_number": accession_number, "checked_at": time.time()},
+        )
+
+    def get_validators(self, cik: str, form_type: str) -> dict:
+        return self._read_json(self.root / "validators" / cik / f"{form_type}.json") or {}
+
+    def set_validators(self, cik: str, form_type: str, validators: dict):
+        self._write_json(self.root / "validators" / cik / f"{form_type}.json", validators)
+
+    def get_filing(self, ticker: str, form_type: str, accession_number: str) -> dict:
+        return self._read_json(self._filing_path(ticker, form_type, accession_number)) or {}
+
+    def update_filing(self, ticker: str, form_type: str, accession_number: str, **fields):
+        filing = self.get_filing(ticker, form_type, accession_number)
+        filing.update(fields)
+        self._write_json(self._filing_path(ticker, form_type, accession_number), filing)
+
+    def blob_path(self, digest: Optional[str]) -> Optional[Path]:
+        if digest is None:
+            return None
+        path = self.root / "objects" / digest
+        return path if path.exists() else None
+
+    def iter_blob(self, digest: str, piece_size: int = 64 * 1024) -> Iterator[str]:
+        """Reads a blob back in pieces of `piece_size` characters."""
+        with open(self.root / "objects" / digest, encoding="utf-8") as f:
+            while piece := f.read(piece_size):
+                yield piece
+
+    @contextmanager
+    def blob_writer(self) -> Iterator["BlobWriter"]:
+        """
+        Streams a blob to disk while hashing it, the blob is only stored under its
+        hash once the block completes without an error.
+        """
+        writer = BlobWriter(self.root / "objects")
+        try:
+            yield writer
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+
+    def is_embedded(self, content: str, metadata: dict) -> bool:
+        return (self.root / "embedded" / self._embedded_digest(content, metadata)).exists()
+
+    def mark_embedded(self, content: str, metadata: dict):
+        self._atomic_write(self.root / "embedded" / self._embedded_digest(content, metadata), "")
+
+    def _embedded_digest(self, content: str, metadata: dict) -> str:
+        # The same text in another filing is embedded again, searches filter on its metadata
+        return self._digest(json.dumps(metadata, sort_keys=True) + "\n" + content)
+
+    def _digest(self, content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _latest_path(self, ticker: str, form_type: str) -> Path:
+        return self.root / "latest" / ticker.upper() / f"{form_type}.json"
+
+    def _filing_path(self, ticker: str, form_type: str, accession_number: str) -> Path:
+        return self.root / "filings" / ticker.upper() / form_type / f"{accession_number}.json"
+
+    def _read_json(self, path: Path) -> Optional[dict]:
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path: Path, data: dict):
+        self._atomic_write(path, json.dumps(data))
+
+    def _atomic_write(self, path: Path, content: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class BlobWriter:
+    def __init__(self, objects_dir: Path):
+        objects_dir.mkdir(parents=True, exist_ok=True)
+        self.objects_dir = objects_dir
+        self.digest: Optional[str] = None
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._tmp_path = objects_dir / f"incoming.{os.getpid()}.{id(self)}.tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+
+    def write(self, content: str):
+        data = content.encode("utf-8")
+        self._file.write(content)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def commit(self):
+        self._file.close()
+        self.digest = self._hash.hexdigest()
+        os.replace(self._tmp_path, self.objects_dir / self.digest)
+
+    def discard(self):
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+filing_cache = FilingCache(
+    os.environ.get("SEC_FILING_CACHE_DIR", "db/sec_filings"),
+    ttl=float(os.environ.get("SEC_FILING_CACHE_TTL", 24 * 60 * 60)),
+)
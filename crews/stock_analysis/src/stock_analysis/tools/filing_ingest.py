@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from tools.filing_cache import FilingCache, filing_cache
+from tools.sec_tools import (
+    SEC10KTool,
+    download_filing,
+    embed_chunks,
+    get_latest_filing_metadata,
+    is_parsed,
+    parse_filing,
+    read_chunks,
+)
+
+MAX_DOWNLOADS = int(os.environ.get("SEC_MAX_DOWNLOADS", 8))
+
+
+def fetch_filing(stock_name: str, form_type: str) -> Optional[dict]:
+    """Makes sure the HTML of the latest filing is cached and returns its cache record."""
+    metadata = get_latest_filing_metadata(stock_name, form_type)
+    if metadata is None:
+        print(f"No {form_type} filings found for {stock_name}.")
+        return None
+
+    accession_number = metadata['accessionNo']
+    cached = filing_cache.get_filing(stock_name, form_type, accession_number)
+    if is_parsed(filing_cache, cached) or filing_cache.blob_path(cached.get("html")):
+        return cached
+
+    with filing_cache.blob_writer() as html_out:
+        for piece in download_filing(metadata['linkToFilingDetails']):
+            html_out.write(piece)
+    filing_cache.update_filing(stock_name, form_type, accession_number, html=html_out.digest)
+    return filing_cache.get_filing(stock_name, form_type, accession_number)
+
+
+def chunk_filing(cache_root: str, stock_name: str, form_type: str, metadata: dict) -> dict:
+    """Parses a cached filing into section chunks and its financial table, runs in a worker process."""
+    cache = FilingCache(cache_root)
+    cached = cache.get_filing(stock_name, form_type, metadata['accessionNo'])
+    for _ in parse_filing(cache, stock_name, form_type, metadata, cache.iter_blob(cached["html"])):
+        pass
+    return cache.get_filing(stock_name, form_type, metadata['accessionNo'])
+
+
+def ingest_filings(
+    tickers: List[str], form_types: List[str], max_downloads: int = MAX_DOWNLOADS
+) -> Dict[Tuple[str, str], bool]:
+    """
+    Fetches, parses and embeds the latest filings of every ticker and form type.
+
+    Downloads run concurrently on a thread pool sharing the rate limited SEC session,
+    parsing runs on a process pool, and embedding happens here as each filing is ready,
+    into the vector store every SEC tool searches. A filing that fails to fetch, parse or
+    embed is reported and skipped. Returns whether each filing was ingested.
+    """
+    # Any SEC tool writes to the shared vector store, chunks carry their ticker, form and accession
+    tool = SEC10KTool()
+    ingested = {}
+
+    def embed(stock_name: str, form_type: str, filing: dict):
+        try:
+            ingested[(stock_name, form_type)] = embed_chunks(
+                tool, read_chunks(filing["chunks"]), stock_name, form_type, filing["metadata"]['accessionNo']
+            )
+        except Exception as e:
+            print(f"Error embedding {form_type} for {stock_name}: {e}")
+            return
+        print(f"Ingested {stock_name} {form_type}")
+
+    with ThreadPoolExecutor(max_downloads) as downloads, ProcessPoolExecutor() as parsers:
+        # Fetches and parses are waited on together, so a parsed filing is embedded
+        # while the rest of the watchlist is still downloading
+        pending = {
+            downloads.submit(fetch_filing, stock_name, form_type): ("fetch", stock_name, form_type)
+            for stock_name in tickers
+            for form_type in form_types
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, stock_name, form_type = pending.pop(future)
+                ingested.setdefault((stock_name, form_type), False)
+                try:
+                    filing = future.result()
+                except Exception as e:
+                    print(f"Error {'fetching' if step == 'fetch' else 'parsing'} {form_type} for {stock_name}: {e}")
+                    continue
+                if filing is None:
+                    continue
+                if step == "parse" or is_parsed(filing_cache, filing):
+                    embed(stock_name, form_type, filing)
+                    continue
+                parse = parsers.submit(chunk_filing, str(filing_cache.root), stock_name, form_type, filing["metadata"])
+                pending[parse] = ("parse", stock_name, form_type)
+
+    return ingested
@@ -0,0 +1,186 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from tools.financial_table import FinancialTable
+
+# Bump when the parsed output changes so cached chunks get rebuilt
+PARSER_VERSION = 2
+
+BLOCK_TAGS = {
+    "p", "div", "br", "tr", "li", "table", "section",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+CELL_TAGS = {"td", "th"}
+# Inline XBRL filings repeat their facts in a hidden ix:header block
+SKIPPED_TAGS = {"script", "style", "head", "ix:header"}
+PERIOD_TAGS = {"xbrli:startdate": "start", "xbrli:enddate": "end", "xbrli:instant": "end"}
+
+SECTION_HEADING = re.compile(r"^(?:part\s+[iv]+\W+)?item\s+(\d{1,2}[a-c]?)\b", re.IGNORECASE)
+MAX_HEADING_LENGTH = 200
+
+
+class FilingTextParser(HTMLParser):
+    """
+    Incremental HTML to text converter, feed it pieces of a filing and pop the
+    paragraphs completed so far, so the whole document is never held in memory.
+
+    Inline XBRL facts (ix:nonFraction) and their contexts are collected on the way,
+    `financial_table()` turns them into a FinancialTable once the filing is parsed.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._current: List[str] = []
+        self._paragraphs: List[str] = []
+        self._contexts: Dict[str, dict] = {}
+        self._context: Optional[dict] = None
+        self._period_field: Optional[str] = None
+        self._facts: List[dict] = []
+        self._fact: Optional[dict] = None
+
+    def handle_starttag(self, tag, attrs):
+        self._handle_xbrl_starttag(tag, dict(attrs))
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._end_paragraph()
+        elif tag in CELL_TAGS:
+            self._current.append(" | ")
+
+    def handle_endtag(self, tag):
+        self._handle_xbrl_endtag(tag)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if self._fact is not None:
+            self._fact["text"] += data
+        elif self._context is not None and self._period_field is not None:
+            self._context[self._period_field] = data.strip()
+        if not self._skip_depth:
+            self._current.append(data)
+
+    def pop_paragraphs(self) -> List[str]:
+        paragraphs, self._paragraphs = self._paragraphs, []
+        return paragraphs
+
+    def close(self):
+        super().close()
+        self._end_paragraph()
+
+    def financial_table(self) -> FinancialTable:
+        table = FinancialTable()
+        for fact in self._facts:
+            context = self._contexts.get(fact["context"])
+            if context is None or context["dimensional"] or "end" not in context:
+                continue
+            value = parse_fact_value(fact["text"], fact["format"], fact["scale"], fact["sign"])
+            if value is not None:
+                table.add(fact["concept"], context.get("start"), context["end"], value, fact["unit"])
+        return table
+
+    def _handle_xbrl_starttag(self, tag, attrs):
+        if tag == "xbrli:context":
+            self._context = {"dimensional": False}
+            self._contexts[attrs.get("id", "")] = self._context
+        elif self._context is not None and tag in ("xbrli:segment", "xbrli:scenario"):
+            self._context["dimensional"] = True
+        elif self._context is not None and tag in PERIOD_TAGS:
+            self._period_field = PERIOD_TAGS[tag]
+        elif tag == "ix:nonfraction" and attrs.get("name"):
+            self._fact = {
+                "concept": attrs["name"].split(":")[-1],
+                "context": attrs.get("contextref", ""),
+                "unit": attrs.get("unitref", ""),
+                "format": attrs.get("format", ""),
+                "scale": attrs.get("scale", "0"),
+                "sign": attrs.get("sign", ""),
+                "text": "",
+            }
+
+    def _handle_xbrl_endtag(self, tag):
+        if tag == "xbrli:context":
+            self._context = None
+        elif tag in PERIOD_TAGS:
+            self._period_field = None
+        elif tag == "ix:nonfraction" and self._fact is not None:
+            self._facts.append(self._fact)
+            self._fact = None
+
+    def _end_paragraph(self):
+        paragraph = " ".join("".join(self._current).split()).strip(" |")
+        self._current = []
+        if paragraph:
+            self._paragraphs.append(paragraph)
+
+
+def parse_fact_value(text: str, number_format: str, scale: str, sign: str) -> Optional[float]:
+    text = text.strip()
+    if "zero" in number_format or text in ("", "-", "—", "–"):
+        value = 0.0
+    else:
+        if "comma-decimal" in number_format or "numcommadecimal" in number_format:
+            text = text.replace(".", "").replace(" ", "").replace(",", ".")
+        else:
+            text = text.replace(",", "").replace(" ", "")
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+    value *= 10 ** int(scale or 0)
+    return -value if sign == "-" else value
+
+
+def iter_paragraphs(html_pieces: Iterable[str], parser: Optional[FilingTextParser] = None) -> Iterator[str]:
+    parser = parser or FilingTextParser()
+    for piece in html_pieces:
+        parser.feed(piece)
+        yield from parser.pop_paragraphs()
+    parser.close()
+    yield from parser.pop_paragraphs()
+
+
+def section_heading(paragraph: str) -> str:
+    """Returns e.g. "Item 1A. Risk Factors" when the paragraph starts a filing section, else ""."""
+    if len(paragraph) > MAX_HEADING_LENGTH:
+        return ""
+    match = SECTION_HEADING.match(paragraph)
+    if match is None:
+        return ""
+    return f"Item {match.group(1).upper()}{paragraph[match.end():]}".strip()
+
+
+def iter_section_chunks(paragraphs: Iterable[str], chunk_size: int = 4000) -> Iterator[dict]:
+    """
+    Groups paragraphs into chunks of about `chunk_size` characters that never span two
+    sections, yielding {"section": ..., "text": ...} as soon as a chunk is complete.
+    """
+    section = "Cover"
+    current: List[str] = []
+    length = 0
+    for paragraph in paragraphs:
+        heading = section_heading(paragraph)
+        if heading or length + len(paragraph) > chunk_size:
+            if current:
+                yield {"section": section, "text": "\n".join(current)}
+            current, length = [], 0
+        if heading:
+            section = heading
+        while len(paragraph) > chunk_size:
+            yield {"section": section, "text": paragraph[:chunk_size]}
+            paragraph = paragraph[chunk_size:]
+        current.append(paragraph)
+        length += len(paragraph) + 1
+    if current:
+        yield {"section": section, "text": "\n".join(current)}
+
+
+def iter_html_chunks(
+    html_pieces: Iterable[str], chunk_size: int = 4000, parser: Optional[FilingTextParser] = None
+) -> Iterator[dict]:
+    # Text is kept as is, punctuation and decimal points matter for financial figures
+    return iter_section_chunks(iter_paragraphs(html_pieces, parser), chunk_size)
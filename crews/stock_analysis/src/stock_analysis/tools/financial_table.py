@@ -0,0 +1,93 @@
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# Common names for the us-gaap concepts companies report them under
+METRIC_ALIASES = {
+    "revenue": ["Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax", "SalesRevenueNet"],
+    "sales": ["Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax", "SalesRevenueNet"],
+    "netsales": ["Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax", "SalesRevenueNet"],
+    "netincome": ["NetIncomeLoss", "ProfitLoss"],
+    "operatingincome": ["OperatingIncomeLoss"],
+    "grossprofit": ["GrossProfit"],
+    "eps": ["EarningsPerShareDiluted", "EarningsPerShareBasic"],
+    "dilutedeps": ["EarningsPerShareDiluted"],
+    "totalassets": ["Assets"],
+    "totalliabilities": ["Liabilities"],
+    "equity": ["StockholdersEquity"],
+    "cash": ["CashAndCashEquivalentsAtCarryingValue"],
+    "operatingcashflow": ["NetCashProvidedByUsedInOperatingActivities"],
+    "capex": ["PaymentsToAcquirePropertyPlantAndEquipment"],
+    "longtermdebt": ["LongTermDebtNoncurrent", "LongTermDebt"],
+}
+
+
+def normalize(name: str) -> str:
+    return "".join(name.lower().split()).replace("_", "").replace("-", "")
+
+
+def period_label(start: Optional[str], end: str) -> str:
+    """
+    "FY2023" for a year ending in 2023, "Q3 2023" for a quarter ending in the third
+    calendar quarter of 2023, the date itself for balance sheet instants.
+    """
+    if start is None:
+        return end
+    end_date = date.fromisoformat(end)
+    days = (end_date - date.fromisoformat(start)).days
+    if 350 <= days <= 380:
+        return f"FY{end_date.year}"
+    if 80 <= days <= 100:
+        return f"Q{(end_date.month - 1) // 3 + 1} {end_date.year}"
+    return f"{start}..{end}"
+
+
+class FinancialTable:
+    """
+    Columnar table of the XBRL facts reported in a filing, indexed by (concept, period)
+    so "Revenue FY2023" is a dictionary lookup rather than a semantic search.
+    Only facts without dimensions are kept, i.e. the consolidated figures.
+    """
+
+    COLUMNS = ("concept", "period", "start", "end", "value", "unit")
+
+    def __init__(self, columns: Optional[Dict[str, list]] = None):
+        self.columns = columns or {name: [] for name in self.COLUMNS}
+        self.index: Dict[Tuple[str, str], int] = {}
+        self.rows_by_concept: Dict[str, List[int]] = {}
+        for row in range(len(self.columns["concept"])):
+            self._index_row(row)
+
+    def __len__(self) -> int:
+        return len(self.columns["concept"])
+
+    def add(self, concept: str, start: Optional[str], end: str, value: float, unit: str):
+        period = period_label(start, end)
+        if (normalize(concept), normalize(period)) in self.index:
+            return
+        for name, item in zip(self.COLUMNS, (concept, period, start, end, value, unit)):
+            self.columns[name].append(item)
+        self._index_row(len(self) - 1)
+
+    def row(self, row: int) -> dict:
+        return {name: self.columns[name][row] for name in self.COLUMNS}
+
+    def lookup(self, metric: str, period: Optional[str] = None) -> List[dict]:
+        """Rows of the metric (a common name or a us-gaap concept) for the period, or for every period."""
+        concepts = [normalize(concept) for concept in METRIC_ALIASES.get(normalize(metric), [metric])]
+        for concept in concepts:
+            if period is not None:
+                row = self.index.get((concept, normalize(period)))
+                rows = [] if row is None else [row]
+            else:
+                rows = self.rows_by_concept.get(concept, [])
+            if rows:
+                return [self.row(row) for row in rows]
+        return []
+
+    def to_dict(self) -> Dict[str, list]:
+        return self.columns
+
+    def _index_row(self, row: int):
+        concept = normalize(self.columns["concept"][row])
+        self.index[(concept, normalize(self.columns["period"][row]))] = row
+        self.rows_by_concept.setdefault(concept, []).append(row)
@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# No fixed Host header, the session also talks to data.sec.gov
+SEC_HEADERS = {
+    "User-Agent": "crewai.com bisan@crewai.com",
+    "Accept-Encoding": "gzip, deflate",
+}
+# SEC asks for no more than 10 requests per second across all of a client's connections
+SEC_REQUESTS_PER_SECOND = float(os.environ.get("SEC_REQUESTS_PER_SECOND", 10))
+SEC_MAX_CONNECTIONS = 16
+
+
+class RateLimiter:
+    """Spaces calls at least 1 / `rate` seconds apart, shared by every thread."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+
+sec_session = requests.Session()
+sec_session.headers.update(SEC_HEADERS)
+sec_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=SEC_MAX_CONNECTIONS,
+        pool_maxsize=SEC_MAX_CONNECTIONS,
+        max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]),
+    ),
+)
+sec_rate_limiter = RateLimiter(SEC_REQUESTS_PER_SECOND)
+
+
+def sec_get(url: str, **kwargs) -> requests.Response:
+    """GET through the pooled, rate limited SEC session."""
+    sec_rate_limiter.wait()
+    return sec_session.get(url, **kwargs)
@@ -0,0 +1,97 @@
+from typing import Any, Optional, Type
+from pydantic.v1 import BaseModel, Field
+from crewai_tools import BaseTool
+
+from tools.sec_tools import load_filing_index, load_financial_table, read_section
+
+FORM_TYPES = ("10-K", "10-Q")
+MAX_SECTION_CHARS = 12000
+
+
+class SECFinancialsToolSchema(BaseModel):
+    """Input for SECFinancialsTool."""
+    metric: str = Field(
+        ...,
+        description="Mandatory financial metric, like Revenue, Net Income, EPS, Total Assets or a us-gaap concept name",
+    )
+    period: Optional[str] = Field(
+        None,
+        description="Optional period like FY2023, Q3 2023 or a balance sheet date like 2023-12-31, leave empty for every period",
+    )
+
+class SECFinancialsTool(BaseTool):
+    name: str = "Look up reported financials"
+    description: str = "A tool that looks up the exact figures a company reported in its latest 10-K and 10-Q XBRL financial statements."
+    args_schema: Type[BaseModel] = SECFinancialsToolSchema
+
+    _stock_name: Optional[str] = None
+    _tables: dict = {}
+
+    def __init__(self, stock_name: str, **kwargs):
+        super().__init__(**kwargs)
+        self._stock_name = stock_name
+        self._tables = {}
+        self.description = f"A tool that looks up the exact figures {stock_name} reported in its latest 10-K and 10-Q XBRL financial statements, e.g. metric Revenue and period FY2023."
+        self._generate_description()
+
+    def _run(self, metric: str, period: Optional[str] = None, **kwargs: Any) -> Any:
+        lines = []
+        for form_type in FORM_TYPES:
+            table = self._table(form_type)
+            if table is None:
+                continue
+            for row in table.lookup(metric, period):
+                lines.append(f"{row['concept']} {row['period']} ({row['start'] or 'as of'} to {row['end']}, {form_type}): {row['value']:,.2f} {row['unit']}")
+        if not lines:
+            return f"No reported {metric}{' for ' + period if period else ''} found for {self._stock_name}."
+        return "\n".join(dict.fromkeys(lines))
+
+    def _table(self, form_type: str):
+        # Parsed once per form, every later lookup is a dictionary access
+        if form_type not in self._tables:
+            try:
+                cached = load_filing_index(self._stock_name, form_type)
+            except Exception as e:
+                print(f"Error loading {form_type} for {self._stock_name}: {e}")
+                return None
+            self._tables[form_type] = load_financial_table(cached) if cached else None
+        return self._tables[form_type]
+
+
+class SECSectionToolSchema(BaseModel):
+    """Input for SECSectionTool."""
+    section: str = Field(
+        ...,
+        description="Mandatory section to read, like Item 1A (risk factors) or Item 7 (management's discussion)",
+    )
+    form_type: str = Field(
+        "10-K", description="The form to read from, 10-K or 10-Q"
+    )
+
+class SECSectionTool(BaseTool):
+    name: str = "Read a section of a SEC form"
+    description: str = "A tool that reads a whole section, like Item 7, of a company's latest 10-K or 10-Q form."
+    args_schema: Type[BaseModel] = SECSectionToolSchema
+
+    _stock_name: Optional[str] = None
+
+    def __init__(self, stock_name: str, **kwargs):
+        super().__init__(**kwargs)
+        self._stock_name = stock_name
+        self.description = f"A tool that reads a whole section, like Item 7, of {stock_name}'s latest 10-K or 10-Q form."
+        self._generate_description()
+
+    def _run(self, section: str, form_type: str = "10-K", **kwargs: Any) -> Any:
+        try:
+            cached = load_filing_index(self._stock_name, form_type)
+        except Exception as e:
+            return f"Error loading {form_type} for {self._stock_name}: {e}"
+        if cached is None:
+            return f"No {form_type} filings found for {self._stock_name}."
+        text = read_section(cached, section)
+        if text is None:
+            sections = ", ".join(dict.fromkeys(entry["section"] for entry in cached.get("sections", [])))
+            return f"No section {section} in {self._stock_name}'s latest {form_type}. Available sections: {sections}"
+        if len(text) > MAX_SECTION_CHARS:
+            return text[:MAX_SECTION_CHARS] + "\n[Section truncated, use the semantic search tools for the rest]"
+        return text
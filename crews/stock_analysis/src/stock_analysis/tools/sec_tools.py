@@ -1,12 +1,309 @@
+import codecs
+import json
 import os
-from typing import Any, Optional, Type
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional, Type
 from pydantic.v1 import BaseModel, Field
 from crewai_tools import RagTool
 from sec_api import QueryApi  # Make sure to have sec_api installed
 from embedchain.models.data_type import DataType
 import requests
-import html2text
-import re
+import threading
+
+from tools.filing_cache import FilingCache, filing_cache
+from tools.filing_text import PARSER_VERSION, FilingTextParser, iter_html_chunks
+from tools.financial_table import FinancialTable
+from tools.sec_http import sec_get
+
+CHUNK_SIZE = 4000
+EMBED_BATCH_SIZE = 8
+
+def get_latest_filing_metadata(stock_name: str, form_type: str) -> Optional[dict]:
+    """
+    Returns the sec-api metadata of the latest filing. A cached accession number is trusted
+    until it expires, then revalidated with a conditional request to EDGAR, and sec-api is
+    only queried when there is a new filing or nothing is known about the stock yet.
+    """
+    accession_number = filing_cache.latest_accession(stock_name, form_type)
+    if accession_number is not None:
+        metadata = filing_cache.get_filing(stock_name, form_type, accession_number).get("metadata")
+        if metadata is not None:
+            return metadata
+
+    accession_number = filing_cache.previous_accession(stock_name, form_type)
+    if accession_number is not None:
+        metadata = filing_cache.get_filing(stock_name, form_type, accession_number).get("metadata")
+        if metadata is not None and metadata.get("cik"):
+            try:
+                unchanged = not has_new_filing(metadata["cik"], form_type, accession_number)
+            except requests.exceptions.RequestException as e:
+                print(f"Could not check EDGAR for new filings: {e}")
+                unchanged = False
+            if unchanged:
+                filing_cache.set_latest_accession(stock_name, form_type, accession_number)
+                return metadata
+
+    queryApi = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
+    query = {
+        "query": {
+            "query_string": {
+                "query": f"ticker:{stock_name} AND formType:\"{form_type}\""
+            }
+        },
+        "from": "0",
+        "size": "1",
+        "sort": [{ "filedAt": { "order": "desc" }}]
+    }
+    filings = queryApi.get_filings(query)['filings']
+    if len(filings) == 0:
+        return None
+
+    metadata = filings[0]
+    filing_cache.update_filing(stock_name, form_type, metadata['accessionNo'], metadata=metadata)
+    filing_cache.set_latest_accession(stock_name, form_type, metadata['accessionNo'])
+    return metadata
+
+def has_new_filing(cik: str, form_type: str, accession_number: str) -> bool:
+    """
+    Whether the company filed a newer form than `accession_number`, asked with a conditional
+    request for its EDGAR submissions. A 304 answer costs a few hundred bytes, and a changed
+    submissions list (any new filing, e.g. an 8-K) only counts if the latest form differs.
+    """
+    validators = filing_cache.get_validators(cik, form_type)
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = sec_get(f"https://data.sec.gov/submissions/CIK{int(cik):010d}.json", headers=headers)
+    if response.status_code == 304:
+        return False
+    response.raise_for_status()
+
+    recent = response.json()["filings"]["recent"]
+    latest = next(
+        (accession for accession, form in zip(recent["accessionNumber"], recent["form"]) if form == form_type),
+        None,
+    )
+    if latest != accession_number:
+        # Validators are only kept once the new filing is known, so a failed refresh is retried
+        return True
+    filing_cache.set_validators(
+        cik,
+        form_type,
+        {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")},
+    )
+    return False
+
+def download_filing(url: str, piece_size: int = 64 * 1024) -> Iterator[str]:
+    """Streams the filing HTML in decoded pieces instead of loading the whole response."""
+    with sec_get(url, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for piece in response.iter_content(chunk_size=piece_size):
+            yield decoder.decode(piece)
+        yield decoder.decode(b"", final=True)
+
+def iter_filing_chunks(stock_name: str, form_type: str) -> Iterator[dict]:
+    """
+    Yields the latest filing as section-aware chunks while it is being downloaded and parsed.
+    Parsed chunks and the raw HTML are cached, so an unchanged filing is read back from disk.
+    """
+    metadata = get_latest_filing_metadata(stock_name, form_type)
+    if metadata is None:
+        print("No filings found for this stock.")
+        return
+
+    cached = filing_cache.get_filing(stock_name, form_type, metadata['accessionNo'])
+    if is_parsed(filing_cache, cached):
+        yield from read_chunks(cached["chunks"])
+        return
+
+    yield from parse_filing(filing_cache, stock_name, form_type, metadata, iter_filing_html(stock_name, form_type, metadata))
+
+def is_parsed(cache: FilingCache, cached: dict) -> bool:
+    return cached.get("parser_version") == PARSER_VERSION and cache.blob_path(cached.get("chunks")) is not None
+
+def parse_filing(cache: FilingCache, stock_name: str, form_type: str, metadata: dict, html_pieces: Iterable[str]) -> Iterator[dict]:
+    """
+    Parses the filing HTML into section chunks, yielding each chunk once it is stored.
+    Alongside the chunks it records the byte range of every section in the chunk blob
+    and the filing's XBRL facts as a FinancialTable.
+    """
+    parser = FilingTextParser()
+    sections = []
+    with cache.blob_writer() as chunks_out:
+        for chunk in iter_html_chunks(html_pieces, CHUNK_SIZE, parser):
+            if not sections or sections[-1]["section"] != chunk["section"]:
+                sections.append({"section": chunk["section"], "start": chunks_out.size})
+            chunks_out.write(json.dumps(chunk) + "\n")
+            sections[-1]["end"] = chunks_out.size
+            yield chunk
+    with cache.blob_writer() as financials_out:
+        financials_out.write(json.dumps(parser.financial_table().to_dict()))
+    cache.update_filing(
+        stock_name,
+        form_type,
+        metadata['accessionNo'],
+        chunks=chunks_out.digest,
+        sections=sections,
+        financials=financials_out.digest,
+        parser_version=PARSER_VERSION,
+    )
+
+def read_chunks(digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[dict]:
+    with open(filing_cache.blob_path(digest), "rb") as f:
+        f.seek(start)
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield json.loads(line)
+
+def load_filing_index(stock_name: str, form_type: str) -> Optional[dict]:
+    """Returns the cache record of the latest filing, parsing the filing first if needed, or None if there is none."""
+    metadata = get_latest_filing_metadata(stock_name, form_type)
+    if metadata is None:
+        return None
+    cached = filing_cache.get_filing(stock_name, form_type, metadata['accessionNo'])
+    if not is_parsed(filing_cache, cached):
+        for _ in iter_filing_chunks(stock_name, form_type):
+            pass
+        cached = filing_cache.get_filing(stock_name, form_type, metadata['accessionNo'])
+    return cached
+
+def read_section(cached: dict, section: str) -> Optional[str]:
+    """Text of a section ("Item 7" or its full heading) via the section offset table, without scanning the filing."""
+    # "Item 7" matches "Item 7. Management's...", "Item 7 —" or "Item 7: ..." but not "Item 7A"
+    wanted = re.compile(re.escape(section.strip().lower().rstrip(".")) + r"(?!\w)")
+    matches = [entry for entry in cached.get("sections", []) if wanted.match(entry["section"].lower())]
+    if not matches:
+        return None
+    # The table of contents repeats every heading, the section itself is the largest match
+    entry = max(matches, key=lambda entry: entry["end"] - entry["start"])
+    return "\n".join(chunk["text"] for chunk in read_chunks(cached["chunks"], entry["start"], entry["end"]))
+
+def load_financial_table(cached: dict) -> FinancialTable:
+    with open(filing_cache.blob_path(cached["financials"]), encoding="utf-8") as f:
+        return FinancialTable(json.load(f))
+
+def iter_filing_html(stock_name: str, form_type: str, metadata: dict) -> Iterator[str]:
+    accession_number = metadata['accessionNo']
+    digest = filing_cache.get_filing(stock_name, form_type, accession_number).get("html")
+    if filing_cache.blob_path(digest) is not None:
+        yield from filing_cache.iter_blob(digest)
+        return
+
+    with filing_cache.blob_writer() as html_out:
+        for piece in download_filing(metadata['linkToFilingDetails']):
+            html_out.write(piece)
+            yield piece
+    filing_cache.update_filing(stock_name, form_type, accession_number, html=html_out.digest)
+
+def embed_chunks(
+    tool: RagTool,
+    chunks: Iterable[dict],
+    stock_name: str,
+    form_type: str,
+    accession_number: str,
+    on_batch: Optional[Callable[[], None]] = None,
+) -> bool:
+    """
+    Embeds chunks as they arrive, batching up to EMBED_BATCH_SIZE chunks of the same section
+    per call, and calls `on_batch` once each batch is searchable. Every SEC tool writes to the
+    same persistent vector store, chunks are tagged with their ticker, form, accession number
+    and section so searches can be limited to one filing. Returns whether any chunk was added.
+    """
+    added = False
+    batch = []
+    for chunk in chunks:
+        if batch and (len(batch) == EMBED_BATCH_SIZE or chunk["section"] != batch[0]["section"]):
+            embed_batch(tool, batch, stock_name, form_type, accession_number)
+            if on_batch is not None:
+                on_batch()
+            batch = []
+        batch.append(chunk)
+        added = True
+    if batch:
+        embed_batch(tool, batch, stock_name, form_type, accession_number)
+        if on_batch is not None:
+            on_batch()
+    return added
+
+def embed_batch(tool: RagTool, batch: list, stock_name: str, form_type: str, accession_number: str):
+    # The vector store is persistent, so text embedded by an earlier run is already searchable
+    content = "\n\n".join(chunk["text"] for chunk in batch)
+    metadata = {
+        "ticker": stock_name.upper(),
+        "form": form_type,
+        "accession": accession_number,
+        "section": batch[0]["section"],
+    }
+    if not filing_cache.is_embedded(content, metadata):
+        tool.add(content, metadata=metadata)
+        filing_cache.mark_embedded(content, metadata)
+
+class FilingLoad:
+    """
+    Embeds one filing on a background thread. A search only waits for the first batch,
+    the rest of the filing becomes searchable while it streams in.
+    """
+
+    def __init__(self, accession_number: str, embed: Callable[[Callable[[], None]], bool]):
+        self.accession_number = accession_number
+        self.done = False
+        self.added = False
+        self.error: Optional[Exception] = None
+        self._has_batch = False
+        self._ready = threading.Event()
+        threading.Thread(target=self._embed, args=(embed,), daemon=True).start()
+
+    @property
+    def failed(self) -> bool:
+        return self.done and (self.error is not None or not self.added)
+
+    def wait(self) -> bool:
+        """
+        Waits until the first batch is embedded and returns True, or False if the filing has
+        no text. An error raised before anything was embedded is raised here.
+        """
+        self._ready.wait()
+        if self._has_batch:
+            return True
+        if self.error is not None:
+            raise self.error
+        return False
+
+    def _batch_embedded(self):
+        self._has_batch = True
+        self._ready.set()
+
+    def _embed(self, embed: Callable[[Callable[[], None]], bool]):
+        try:
+            self.added = embed(self._batch_embedded)
+        except Exception as e:
+            self.error = e
+            if self._has_batch:
+                print(f"Error embedding filing {self.accession_number}, searching the part embedded so far: {e}")
+        finally:
+            self.done = True
+            self._ready.set()
+
+def search_filing(tool: RagTool, search_query: str, stock_name: str, form_type: str, accession_number: str) -> str:
+    """
+    Semantic search over the shared vector store, restricted to one filing. Earlier filings
+    of the same ticker and form stay in the store, the accession number keeps them out.
+    """
+    result, sources = tool.adapter.embedchain_app.query(
+        search_query,
+        citations=True,
+        dry_run=not tool.summarize,
+        where={"ticker": stock_name.upper(), "form": form_type, "accession": accession_number},
+    )
+    if tool.summarize:
+        return f"Relevant Content:\n{result}"
+    return "Relevant Content:\n" + "\n\n".join(source[0] for source in sources)
 
 class FixedSEC10KToolSchema(BaseModel):
     """Input for SEC10KTool."""
@@ -26,67 +323,64 @@ class SEC10KTool(RagTool):
     description: str = "A tool that can be used to semantic search a query from a 10-K form for a specified company."
     args_schema: Type[BaseModel] = SEC10KToolSchema
 
+    _stock_name: Optional[str] = None
+    _loads: dict = {}
+    _load_lock: Any = None
+
     def __init__(self, stock_name: Optional[str] = None, **kwargs):
-        print("enter init")
-        # exit()
         super().__init__(**kwargs)
+        self._loads = {}
+        self._load_lock = threading.Lock()
         if stock_name is not None:
-            content = self.get_10k_url_content(stock_name)
-            if content:
-                self.add(content)
-                # print("exit init")
-                # exit()
-                self.description = f"A tool that can be used to semantic search a query from {stock_name}'s latest 10-K SEC form's content as a txt file."
-                self.args_schema = FixedSEC10KToolSchema
-                self._generate_description()
-
-    def get_10k_url_content(self, stock_name: str) -> Optional[str]:
-        """Fetches the URL content as txt of the latest 10-K form for the given stock name."""
-        try:
-            queryApi = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
-            query = {
-                "query": {
-                    "query_string": {
-                        "query": f"ticker:{stock_name} AND formType:\"10-K\""
-                    }
-                },
-                "from": "0",
-                "size": "1",
-                "sort": [{ "filedAt": { "order": "desc" }}]
-            }
-            filings = queryApi.get_filings(query)['filings']
-            if len(filings) == 0:
-                print("No filings found for this stock.")
-                return None
-
-            url = filings[0]['linkToFilingDetails']
-            
-            headers = {
-                "User-Agent": "crewai.com bisan@crewai.com",
-                "Accept-Encoding": "gzip, deflate",
-                "Host": "www.sec.gov"
-            }
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            text = h.handle(response.content.decode("utf-8"))
-
-            text = re.sub(r"[^a-zA-Z$0-9\s\n]", "", text)
-            return text
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP error occurred: {e}")
-            return None
-        except Exception as e:
-            print(f"Error fetching 10-K URL: {e}")
-            return None
+            # The filing is only downloaded and embedded on the first search
+            self._stock_name = stock_name
+            self.description = f"A tool that can be used to semantic search a query from {stock_name}'s latest 10-K SEC form's content as a txt file."
+            self.args_schema = FixedSEC10KToolSchema
+            self._generate_description()
+
+    def load(self, stock_name: str) -> Optional[str]:
+        """
+        Starts embedding the latest 10-K form of the given stock once and returns its accession
+        number as soon as the first batch is searchable, or None if there is nothing to search.
+        Errors before the first batch propagate, a load that failed is started again on the next search.
+        """
+        with self._load_lock:
+            load = self._loads.get(stock_name)
+            if load is None or load.failed:
+                metadata = get_latest_filing_metadata(stock_name, "10-K")
+                if metadata is None:
+                    return None
+                accession_number = metadata['accessionNo']
+                load = self._loads[stock_name] = FilingLoad(
+                    accession_number,
+                    lambda on_batch: embed_chunks(
+                        self, self.get_10k_chunks(stock_name), stock_name, "10-K", accession_number, on_batch
+                    ),
+                )
+        # Waiting happens outside the lock, searches for other stocks don't queue behind this one
+        return load.accession_number if load.wait() else None
+
+    def get_10k_chunks(self, stock_name: str) -> Iterator[dict]:
+        """Streams the latest 10-K form for the given stock name as section chunks."""
+        return iter_filing_chunks(stock_name, "10-K")
 
     def add(self, *args: Any, **kwargs: Any) -> None:
         kwargs["data_type"] = DataType.TEXT
         super().add(*args, **kwargs)
 
     def _run(self, search_query: str, **kwargs: Any) -> Any:
-        return super()._run(query=search_query, **kwargs)
+        stock_name = kwargs.get("stock_name") or self._stock_name
+        if stock_name is None:
+            return super()._run(query=search_query, **kwargs)
+        try:
+            accession_number = self.load(stock_name)
+        except requests.exceptions.HTTPError as e:
+            return f"Could not load the latest 10-K form for {stock_name}, HTTP error occurred: {e}"
+        except Exception as e:
+            return f"Could not load the latest 10-K form for {stock_name}: {e}"
+        if accession_number is None:
+            return f"Could not load the latest 10-K form for {stock_name}."
+        return search_filing(self, search_query, stock_name, "10-K", accession_number)
 
 
 class FixedSEC10QToolSchema(BaseModel):
@@ -107,64 +401,62 @@ class SEC10QTool(RagTool):
     description: str = "A tool that can be used to semantic search a query from a 10-Q form for a specified company."
     args_schema: Type[BaseModel] = SEC10QToolSchema
 
+    _stock_name: Optional[str] = None
+    _loads: dict = {}
+    _load_lock: Any = None
+
     def __init__(self, stock_name: Optional[str] = None, **kwargs):
-        print("enter init")
-        # exit()
         super().__init__(**kwargs)
+        self._loads = {}
+        self._load_lock = threading.Lock()
         if stock_name is not None:
-            content = self.get_10q_url_content(stock_name)
-            if content:
-                self.add(content)
-                self.description = f"A tool that can be used to semantic search a query from {stock_name}'s latest 10-Q SEC form's content as a txt file."
-                self.args_schema = FixedSEC10QToolSchema
-                self._generate_description()
-
-    def get_10q_url_content(self, stock_name: str) -> Optional[str]:
-        """Fetches the URL content as txt of the latest 10-Q form for the given stock name."""
-        try:
-            queryApi = QueryApi(api_key=os.environ['SEC_API_API_KEY'])
-            query = {
-                "query": {
-                    "query_string": {
-                        "query": f"ticker:{stock_name} AND formType:\"10-Q\""
-                    }
-                },
-                "from": "0",
-                "size": "1",
-                "sort": [{ "filedAt": { "order": "desc" }}]
-            }
-            filings = queryApi.get_filings(query)['filings']
-            if len(filings) == 0:
-                print("No filings found for this stock.")
-                return None
-
-            url = filings[0]['linkToFilingDetails']
-            
-            headers = {
-                "User-Agent": "crewai.com bisan@crewai.com",
-                "Accept-Encoding": "gzip, deflate",
-                "Host": "www.sec.gov"
-            }
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            text = h.handle(response.content.decode("utf-8"))
-
-            # Removing all non-English words, dollar signs, numbers, and newlines from text
-            text = re.sub(r"[^a-zA-Z$0-9\s\n]", "", text)
-            return text
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP error occurred: {e}")
-            return None
-        except Exception as e:
-            print(f"Error fetching 10-Q URL: {e}")
-            return None
+            # The filing is only downloaded and embedded on the first search
+            self._stock_name = stock_name
+            self.description = f"A tool that can be used to semantic search a query from {stock_name}'s latest 10-Q SEC form's content as a txt file."
+            self.args_schema = FixedSEC10QToolSchema
+            self._generate_description()
+
+    def load(self, stock_name: str) -> Optional[str]:
+        """
+        Starts embedding the latest 10-Q form of the given stock once and returns its accession
+        number as soon as the first batch is searchable, or None if there is nothing to search.
+        Errors before the first batch propagate, a load that failed is started again on the next search.
+        """
+        with self._load_lock:
+            load = self._loads.get(stock_name)
+            if load is None or load.failed:
+                metadata = get_latest_filing_metadata(stock_name, "10-Q")
+                if metadata is None:
+                    return None
+                accession_number = metadata['accessionNo']
+                load = self._loads[stock_name] = FilingLoad(
+                    accession_number,
+                    lambda on_batch: embed_chunks(
+                        self, self.get_10q_chunks(stock_name), stock_name, "10-Q", accession_number, on_batch
+                    ),
+                )
+        # Waiting happens outside the lock, searches for other stocks don't queue behind this one
+        return load.accession_number if load.wait() else None
+
+    def get_10q_chunks(self, stock_name: str) -> Iterator[dict]:
+        """Streams the latest 10-Q form for the given stock name as section chunks."""
+        return iter_filing_chunks(stock_name, "10-Q")
 
     def add(self, *args: Any, **kwargs: Any) -> None:
         kwargs["data_type"] = DataType.TEXT
         super().add(*args, **kwargs)
 
     def _run(self, search_query: str, **kwargs: Any) -> Any:
-        return super()._run(query=search_query, **kwargs)
+        stock_name = kwargs.get("stock_name") or self._stock_name
+        if stock_name is None:
+            return super()._run(query=search_query, **kwargs)
+        try:
+            accession_number = self.load(stock_name)
+        except requests.exceptions.HTTPError as e:
+            return f"Could not load the latest 10-Q form for {stock_name}, HTTP error occurred: {e}"
+        except Exception as e:
+            return f"Could not load the latest 10-Q form for {stock_name}: {e}"
+        if accession_number is None:
+            return f"Could not load the latest 10-Q form for {stock_name}."
+        return search_filing(self, search_query, stock_name, "10-Q", accession_number)
 
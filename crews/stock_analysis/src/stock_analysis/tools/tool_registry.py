@@ -0,0 +1,20 @@
+import threading
+from typing import Any, Dict, Optional, Tuple, Type
+
+
+class ToolRegistry:
+    """
+    Hands out one shared tool instance per (tool class, stock name) so agents of the
+    same crew never fetch and embed the same filing twice.
+    """
+
+    def __init__(self):
+        self._tools: Dict[Tuple[Type, Optional[str]], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool_class: Type, stock_name: Optional[str] = None) -> Any:
+        key = (tool_class, stock_name)
+        with self._lock:
+            if key not in self._tools:
+                self._tools[key] = tool_class(stock_name) if stock_name is not None else tool_class()
+            return self._tools[key]
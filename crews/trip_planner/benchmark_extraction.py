@@ -0,0 +1,75 @@
+import sys
+import time
+from pathlib import Path
+
+from tools.content_extractor import BlockDeduper, extract_main_content, parse_blocks
+from tools.text_chunker import estimate_tokens
+
+
+def load_corpus(directory):
+  """Saved pages laid out as <directory>/<site>/<page>.html, e.g. saved with
+  `curl -L https://www.lonelyplanet.com/portugal/lisbon \
+    > corpus/lonelyplanet.com/lisbon.html`."""
+  pages = []
+  for path in sorted(Path(directory).glob("*/*.htm*")):
+    url = f"https://{path.parent.name}/{path.stem}"
+    pages.append((url, path.read_text(encoding="utf-8", errors="replace")))
+  return pages
+
+
+def baseline_text(html):
+  # What the browser tools summarized before: every element partition_html finds
+  try:
+    from unstructured.partition.html import partition_html
+  except ImportError:
+    return "\n\n".join(block.text for block in parse_blocks(html))
+  return "\n\n".join([str(el) for el in partition_html(text=html)])
+
+
+def _timed(function):
+  started_at = time.perf_counter()
+  result = function()
+  return result, time.perf_counter() - started_at
+
+
+def extraction():
+  """
+  Compare the text the browser tools send to the LLM with and without boilerplate
+  stripping, over a corpus of saved pages.
+
+  Usage: python benchmark_extraction.py <corpus directory> [token budget per page]
+  """
+  if len(sys.argv) < 2:
+    print(extraction.__doc__)
+    return
+  pages = load_corpus(sys.argv[1])
+  token_budget = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+  if not pages:
+    print(f"No pages found in {sys.argv[1]}")
+    return
+  html_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+
+  baseline, baseline_seconds = _timed(
+      lambda: [baseline_text(html) for _, html in pages])
+  deduper = BlockDeduper()
+  extracted, extracted_seconds = _timed(lambda: [
+      extract_main_content(url, html, token_budget=token_budget, deduper=deduper)
+      for url, html in pages])
+
+  baseline_tokens = sum(map(estimate_tokens, baseline))
+  extracted_tokens = sum(map(estimate_tokens, extracted))
+  saved = 1 - extracted_tokens / baseline_tokens if baseline_tokens else 0
+
+  html_mb = html_bytes / 1024 / 1024
+  baseline_ms = baseline_seconds * 1000 / len(pages)
+  extracted_ms = extracted_seconds * 1000 / len(pages)
+  print(f"{len(pages)} pages, {html_mb:.2f} MB of HTML, "
+        f"budget {token_budget} tokens per page:")
+  print(f"all elements:      {baseline_tokens:>9} tokens  {baseline_ms:8.2f} ms/page")
+  print(f"main content:      {extracted_tokens:>9} tokens  {extracted_ms:8.2f} ms/page"
+        f"  {html_mb / extracted_seconds:.1f} MB/s")
+  print(f"tokens saved:      {baseline_tokens - extracted_tokens:>9} ({saved:.1%})")
+
+
+if __name__ == "__main__":
+  extraction()
@@ -0,0 +1,245 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from tools.scrape_cache import normalize_url
+from tools.text_chunker import estimate_tokens
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+    "ul", "ol", "li", "dl", "dt", "dd", "table", "tr", "pre", "blockquote",
+    "figure", "figcaption", "form", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+CELL_TAGS = {"td", "th"}
+SKIPPED_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe", "head", "select",
+    "button",
+}
+VOID_TAGS = {
+    "br", "hr", "img", "input", "meta", "link", "source", "wbr", "area", "col", "embed",
+    "base", "track",
+}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form", "menu", "dialog"}
+CONTENT_TAGS = {"main", "article"}
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+
+BOILERPLATE_HINT = re.compile(
+    r"(?:^|[-_\s])(?:nav|navbar|menu|footer|sidebar|breadcrumbs?|cookies?|consent|gdpr|"
+    r"banner|newsletter|subscribe|social|share|sharing|promo|popup|modal|ads?|advert\w*|"
+    r"sponsored|related|comments?|pagination|skip)(?:$|[-_\s])", re.IGNORECASE)
+CONTENT_HINT = re.compile(
+    r"(?:^|[-_\s])(?:content|article|post|entry|story|body|text|main|description|review)(?:$|[-_\s])",
+    re.IGNORECASE)
+
+MIN_SCORE = 1.0
+PAGE_TOKEN_BUDGET = int(os.environ.get("BROWSER_PAGE_TOKEN_BUDGET", 6000))
+
+
+class Block():
+  __slots__ = ("text", "link_chars", "heading", "boilerplate", "content", "score")
+
+  def __init__(self, text, link_chars, heading, boilerplate, content):
+    self.text = text
+    self.link_chars = link_chars
+    self.heading = heading
+    self.boilerplate = boilerplate
+    self.content = content
+    self.score = score_block(self)
+
+  def render(self):
+    return f"{'#' * self.heading} {self.text}" if self.heading else self.text
+
+
+class BlockParser(HTMLParser):
+  """
+  Splits a page into text blocks at block level tags. Every open element carries the
+  context inherited from its ancestors (inside a link, a heading, navigation or footer
+  like markup, article like markup), so a block knows where its text came from without
+  walking the tree again.
+  """
+
+  def __init__(self):
+    super().__init__(convert_charrefs=True)
+    # (tag, in link, heading level, boilerplate, content)
+    self._stack = [("", False, 0, False, False)]
+    self._skip_depth = 0
+    self._pieces = []
+    self._link_chars = 0
+    self._context = None
+    self.blocks = []
+
+  def handle_starttag(self, tag, attrs):
+    if tag in SKIPPED_TAGS:
+      if tag not in VOID_TAGS:
+        self._skip_depth += 1
+      return
+    if tag in BLOCK_TAGS:
+      self._end_block()
+      # <p> and <li> are often left open, the next one closes them
+      if tag in ("p", "li") and self._stack[-1][0] == tag:
+        self._stack.pop()
+    elif tag in CELL_TAGS:
+      self._pieces.append(" | ")
+    if tag in VOID_TAGS:
+      return
+    _, in_link, heading, boilerplate, content = self._stack[-1]
+    hints = " ".join(
+        value for name, value in attrs if name in ("class", "id", "role") and value)
+    self._stack.append((
+        tag,
+        in_link or tag == "a",
+        HEADING_LEVELS.get(tag, heading),
+        boilerplate or bool(hints and BOILERPLATE_HINT.search(hints))
+        # An article's own <header> holds its title, not the site's navigation
+        or (tag in BOILERPLATE_TAGS and not (tag == "header" and content)),
+        content or tag in CONTENT_TAGS or bool(hints and CONTENT_HINT.search(hints)),
+    ))
+
+  def handle_endtag(self, tag):
+    if tag in SKIPPED_TAGS:
+      self._skip_depth = max(self._skip_depth - 1, 0)
+      return
+    if tag in BLOCK_TAGS:
+      self._end_block()
+    # Unmatched end tags are ignored, a matched one also closes whatever was left open
+    # inside it
+    for depth in range(len(self._stack) - 1, 0, -1):
+      if self._stack[depth][0] == tag:
+        del self._stack[depth:]
+        break
+
+  def handle_data(self, data):
+    if self._skip_depth or not data.strip():
+      return
+    if self._context is None:
+      self._context = self._stack[-1]
+    if self._stack[-1][1]:
+      self._link_chars += len(data.strip())
+    self._pieces.append(data)
+
+  def close(self):
+    super().close()
+    self._end_block()
+
+  def _end_block(self):
+    if self._pieces:
+      text = " ".join("".join(self._pieces).split()).strip(" |")
+      if text:
+        _, _, heading, boilerplate, content = self._context
+        self.blocks.append(Block(text, self._link_chars, heading, boilerplate, content))
+    self._pieces = []
+    self._link_chars = 0
+    self._context = None
+
+
+def score_block(block):
+  """
+  Scores how likely a block is main content: long prose scores high, link lists,
+  navigation, footers, cookie banners and share widgets score low.
+  """
+  text = block.text
+  words = text.count(" ") + 1
+  if block.heading:
+    score = 1.5 if words <= 20 else 1.0
+  else:
+    score = min(words, 60) / 12 + min(text.count(".") + text.count(","), 5) * 0.2
+    if any(character.isdigit() for character in text):
+      score += 0.3
+    if " | " in text:
+      # Table rows are short but dense, a table's header row shouldn't be dropped
+      score += 0.5
+  score -= 3 * block.link_chars / len(text)
+  if block.boilerplate:
+    score -= 3
+  if block.content:
+    score += 0.5
+  return score
+
+
+def is_main_content(block):
+  """
+  Blocks scoring at least MIN_SCORE, and short lines inside main or article markup
+  like "Price: 12" that score low on length alone, unless they're boilerplate or mostly
+  links.
+  """
+  if block.score >= MIN_SCORE:
+    return True
+  return (
+      block.content
+      and not block.boilerplate
+      and block.link_chars * 2 < len(block.text))
+
+
+def parse_blocks(html):
+  parser = BlockParser()
+  parser.feed(html)
+  parser.close()
+  return parser.blocks
+
+
+class BlockDeduper():
+  """
+  Remembers the page of a site each block was first seen on. A block that shows up
+  again on another page of the same site (menus, footers, banners the scorer missed) is
+  boilerplate, on the page it was first seen on it's kept, so extracting a page is
+  stable.
+  """
+
+  def __init__(self, max_blocks_per_site=50000):
+    self.max_blocks_per_site = max_blocks_per_site
+    self._sites = {}
+    self._lock = threading.Lock()
+
+  def is_repeated(self, url, text):
+    page = normalize_url(url)
+    site = (urlsplit(page).hostname or "").removeprefix("www.")
+    key = hash(text.lower())
+    with self._lock:
+      blocks = self._sites.setdefault(site, OrderedDict())
+      first_page = blocks.get(key)
+      if first_page is None:
+        blocks[key] = page
+        if len(blocks) > self.max_blocks_per_site:
+          blocks.popitem(last=False)
+        return False
+      blocks.move_to_end(key)
+      return first_page != page
+
+
+block_deduper = BlockDeduper()
+
+
+def fit_budget(blocks, token_budget):
+  """The highest scoring blocks that fit the budget, in page order."""
+  if sum(estimate_tokens(block.text) for block in blocks) <= token_budget:
+    return blocks
+  kept = set()
+  used = 0
+  for index in sorted(range(len(blocks)), key=lambda index: -blocks[index].score):
+    tokens = estimate_tokens(blocks[index].text)
+    if used + tokens <= token_budget:
+      kept.add(index)
+      used += tokens
+  return [block for index, block in enumerate(blocks) if index in kept]
+
+
+def extract_main_content(
+    url, html, token_budget=PAGE_TOKEN_BUDGET, deduper=block_deduper):
+  """
+  The main content of a page as text, headings marked with #. Boilerplate blocks and
+  blocks repeated from other pages of the site are dropped, and the result is capped to
+  `token_budget` tokens, keeping the highest scoring blocks.
+  """
+  blocks = parse_blocks(html)
+  content = [block for block in blocks if is_main_content(block)]
+  unique = [
+      block for block in content
+      if deduper is None or not deduper.is_repeated(url, block.text)]
+  # The same page under another URL of the site repeats all of its content, keep it
+  # then rather than nothing, and only when nothing looks like content the whole page
+  content = unique or content or blocks
+  return "\n\n".join(block.render() for block in fit_budget(content, token_budget))
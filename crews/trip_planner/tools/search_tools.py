@@ -1,9 +1,9 @@
-import json
-import os
-
-import requests
 from langchain.tools import tool
 
+from tools.search_client import merge_results, parse_queries, search_client
+
+MAX_BATCH_QUERIES = 10
+
 
 class SearchTools():
 
@@ -12,18 +12,14 @@ class SearchTools():
     """Useful to search the internet
     about a a given topic and return relevant results"""
     top_result_to_return = 4
-    url = "https://google.serper.dev/search"
-    payload = json.dumps({"q": query})
-    headers = {
-        'X-API-KEY': os.environ['SERPER_API_KEY'],
-        'content-type': 'application/json'
-    }
-    response = requests.request("POST", url, headers=headers, data=payload)
+    # Pooled, cached and deduplicated with concurrent identical searches
+    data = search_client.search(query)
     # check if there is an organic key
-    if 'organic' not in response.json():
-      return "Sorry, I couldn't find anything about that, there could be an error with you serper api key."
+    if 'organic' not in data:
+      return ("Sorry, I couldn't find anything about that, there could be an error "
+              "with you serper api key.")
     else:
-      results = response.json()['organic']
+      results = data['organic']
       string = []
       for result in results[:top_result_to_return]:
         try:
@@ -32,6 +28,34 @@ class SearchTools():
               f"Snippet: {result['snippet']}", "\n-----------------"
           ]))
         except KeyError:
-          next
+          continue
 
       return '\n'.join(string)
+
+  @tool("Search the internet for several queries at once")
+  def search_internet_batch(queries):
+    """Useful to run several related internet searches at once instead of one by one,
+    pass a list of queries or one query per line. Returns the results of all of them
+    in a single list, best matches first."""
+    top_result_to_return = 10
+    queries = parse_queries(queries)[:MAX_BATCH_QUERIES]
+    if not queries:
+      return "Sorry, there were no queries to search for."
+    # Searched concurrently, pages found by several queries are listed once
+    results = merge_results(queries, search_client.search_many(queries))
+    if not results:
+      return ("Sorry, I couldn't find anything about that, there could be an error "
+              "with you serper api key.")
+    string = []
+    for result in results[:top_result_to_return]:
+      try:
+        string.append('\n'.join([
+            f"Title: {result['title']}", f"Link: {result['link']}",
+            f"Snippet: {result['snippet']}",
+            f"Found by: {'; '.join(result['queries'])}",
+            "\n-----------------"
+        ]))
+      except KeyError:
+        continue
+
+    return '\n'.join(string)
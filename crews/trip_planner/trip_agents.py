@@ -16,6 +16,7 @@ class TripAgents():
         'An expert in analyzing travel data to pick ideal destinations',
         tools=[
             SearchTools.search_internet,
+            SearchTools.search_internet_batch,
             BrowserTools.scrape_and_summarize_website,
         ],
         verbose=True)
@@ -28,6 +29,7 @@ class TripAgents():
         about the city, it's attractions and customs""",
         tools=[
             SearchTools.search_internet,
+            SearchTools.search_internet_batch,
             BrowserTools.scrape_and_summarize_website,
         ],
         verbose=True)
@@ -41,6 +43,7 @@ class TripAgents():
         decades of experience""",
         tools=[
             SearchTools.search_internet,
+            SearchTools.search_internet_batch,
             BrowserTools.scrape_and_summarize_website,
             CalculatorTools.calculate,
         ],
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+import asyncio
+import sys
+import time
+from itertools import islice
+
+from lead_score_flow.constants import (
+    JOB_DESCRIPTION,
+    LEADS_CSV,
+    MAX_CONCURRENT_CREWS,
+    SCORE_BATCH_SIZE,
+)
+from lead_score_flow.crews.lead_batch_score_crew.lead_batch_score_crew import (
+    LeadBatchScoreCrew,
+)
+from lead_score_flow.crews.lead_score_crew.lead_score_crew import LeadScoreCrew
+from lead_score_flow.utils.candidateUtils import batched, format_candidates
+from lead_score_flow.utils.ingest import CandidateStore, iter_lead_batches
+from lead_score_flow.utils.pool import CrewPool
+
+
+async def _score(candidates, batch_size: int):
+    """
+    Score the candidates with the given batch size and return (total tokens, seconds).
+    """
+    total_tokens = 0
+    started_at = time.perf_counter()
+    for batch in batched(candidates, batch_size):
+        if batch_size == 1:
+            candidate = batch[0]
+            crew = LeadScoreCrew().crew()
+            inputs = {
+                "candidate_id": candidate.id,
+                "name": candidate.name,
+                "bio": candidate.bio,
+                "job_description": JOB_DESCRIPTION,
+                "additional_instructions": "",
+            }
+        else:
+            crew = LeadBatchScoreCrew().crew()
+            inputs = {
+                "candidates": format_candidates(batch),
+                "job_description": JOB_DESCRIPTION,
+                "additional_instructions": "",
+            }
+        result = await crew.kickoff_async(inputs=inputs)
+        total_tokens += result.token_usage.total_tokens
+    return total_tokens, time.perf_counter() - started_at
+
+
+def batch_scoring():
+    """
+    Compare tokens per lead and leads per minute for single vs batched scoring.
+
+    Usage: benchmark_scoring [number of leads] [batch size]
+    """
+    sample_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else max(SCORE_BATCH_SIZE, 5)
+
+    store = CandidateStore()
+    candidates = list(islice(store.ingest(iter_lead_batches(LEADS_CSV)), sample_size))
+
+    print(f"Benchmarking {len(candidates)} leads")
+    for size in (1, batch_size):
+        tokens, seconds = asyncio.run(_score(candidates, size))
+        print(
+            f"batch size {size}: {tokens / len(candidates):.0f} tokens/lead, "
+            f"{len(candidates) / seconds * 60:.1f} leads/min"
+        )
+
+
+def crew_setup():
+    """
+    Compare per-candidate crew setup time when building a fresh crew vs copying one from a CrewPool template.
+
+    Usage: benchmark_crew_setup [number of candidates]
+    """
+    candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    started_at = time.perf_counter()
+    for _ in range(candidates):
+        LeadScoreCrew().crew()
+    fresh = (time.perf_counter() - started_at) / candidates
+
+    async def checkout_all():
+        pool = CrewPool(lambda: LeadScoreCrew().crew(), MAX_CONCURRENT_CREWS)
+
+        async def checkout():
+            async with pool.crew():
+                await asyncio.sleep(0)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(checkout() for _ in range(candidates)))
+        return (time.perf_counter() - started_at) / candidates
+
+    pooled = asyncio.run(checkout_all())
+    print(f"Setup per candidate over {candidates} candidates:")
+    print(f"fresh LeadScoreCrew().crew(): {fresh * 1000:.3f} ms")
+    print(f"CrewPool template copy (size {MAX_CONCURRENT_CREWS}): {pooled * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    batch_scoring()
@@ -1,3 +1,6 @@
+import os
+from pathlib import Path
+
 JOB_DESCRIPTION = """
 # Junior React Developer
 
@@ -45,3 +48,57 @@ SKILLS = [
     "REST APIs",
     "CrewAI",
 ]
+
+# Scoring scheduler settings
+MODEL = os.getenv("MODEL", "gpt-4o-mini")
+MAX_CONCURRENT_CREWS = int(os.getenv("LEAD_SCORE_MAX_CONCURRENT_CREWS", "10"))
+REQUESTS_PER_MINUTE = int(os.getenv("LEAD_SCORE_REQUESTS_PER_MINUTE", "60"))
+MAX_RETRIES = int(os.getenv("LEAD_SCORE_MAX_RETRIES", "5"))
+# Candidates evaluated per crew kickoff, 1 scores every candidate on its own
+SCORE_BATCH_SIZE = int(os.getenv("LEAD_SCORE_BATCH_SIZE", "1"))
+
+# Lead ingestion settings
+LEADS_CSV = Path(os.getenv("LEAD_SCORE_LEADS_CSV", Path(__file__).parent / "leads.csv"))
+LOAD_BATCH_SIZE = int(os.getenv("LEAD_SCORE_LOAD_BATCH_SIZE", "500"))
+
+# Score cache settings
+SCORE_CACHE_PATH = Path(
+    os.getenv("LEAD_SCORE_CACHE_PATH", Path(__file__).parent / "score_cache.sqlite3")
+)
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("LEAD_SCORE_CACHE_MAX_ENTRIES", "100000"))
+SCORE_CACHE_MAX_AGE = (
+    float(os.environ["LEAD_SCORE_CACHE_MAX_AGE"])
+    if os.getenv("LEAD_SCORE_CACHE_MAX_AGE")
+    else None
+)
+
+# Top-K review and re-scoring settings
+TOP_K = int(os.getenv("LEAD_SCORE_TOP_K", "3"))
+# "boundary" only re-scores candidates near the top-K cutoff after feedback, then any top-K
+# candidate still scored in an earlier round, "full" re-scores everyone
+RESCORE_MODE = os.getenv("LEAD_SCORE_RESCORE_MODE", "boundary")
+RESCORE_MARGIN = int(os.getenv("LEAD_SCORE_RESCORE_MARGIN", "10"))
+
+# Set to DEBUG to log full candidate and score records
+LOG_LEVEL = os.getenv("LEAD_SCORE_LOG_LEVEL", "INFO")
+
+# Email output settings
+EMAIL_OUTPUT_DIR = Path(
+    os.getenv("LEAD_SCORE_EMAIL_OUTPUT_DIR", Path(__file__).parent / "email_responses")
+)
+# "files" writes one file per candidate, "jsonl" and "sqlite" write a single archive
+EMAIL_OUTPUT_MODE = os.getenv("LEAD_SCORE_EMAIL_OUTPUT_MODE", "files")
+
+# Review settings: "interactive" asks on the terminal, "rules" decides from DECISION_RULES_FILE.
+# An external reviewer, such as a web UI, is plugged in with LeadScoreFlow(decision_provider=...)
+DECISION_POLICY = os.getenv("LEAD_SCORE_DECISION_POLICY", "interactive")
+DECISION_RULES_FILE = Path(
+    os.getenv("LEAD_SCORE_DECISION_RULES_FILE", Path(__file__).parent / "decision_rules.json")
+)
+
+# Checkpoint settings, progress is appended to CHECKPOINT_PATH and replayed on the next run
+CHECKPOINT_PATH = Path(
+    os.getenv("LEAD_SCORE_CHECKPOINT_PATH", Path(__file__).parent / "checkpoint.jsonl")
+)
+CHECKPOINT_FLUSH_EVERY = int(os.getenv("LEAD_SCORE_CHECKPOINT_FLUSH_EVERY", "100"))
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("LEAD_SCORE_CHECKPOINT_FLUSH_INTERVAL", "5"))
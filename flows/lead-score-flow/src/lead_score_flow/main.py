@@ -1,58 +1,156 @@
 #!/usr/bin/env python
 import asyncio
-from typing import List
+import logging
+from typing import Dict, List, Optional
 
 from crewai.flow.flow import Flow, listen, or_, router, start
 from pydantic import BaseModel
 
-from lead_score_flow.constants import JOB_DESCRIPTION
+from lead_score_flow.constants import (
+    CHECKPOINT_FLUSH_EVERY,
+    CHECKPOINT_FLUSH_INTERVAL,
+    CHECKPOINT_PATH,
+    DECISION_POLICY,
+    DECISION_RULES_FILE,
+    EMAIL_OUTPUT_DIR,
+    EMAIL_OUTPUT_MODE,
+    JOB_DESCRIPTION,
+    LEADS_CSV,
+    LOAD_BATCH_SIZE,
+    LOG_LEVEL,
+    MAX_CONCURRENT_CREWS,
+    MAX_RETRIES,
+    MODEL,
+    REQUESTS_PER_MINUTE,
+    RESCORE_MARGIN,
+    RESCORE_MODE,
+    SCORE_BATCH_SIZE,
+    SCORE_CACHE_MAX_AGE,
+    SCORE_CACHE_MAX_ENTRIES,
+    SCORE_CACHE_PATH,
+    TOP_K,
+)
+from lead_score_flow.crews.lead_batch_score_crew.lead_batch_score_crew import (
+    LeadBatchScoreCrew,
+)
 from lead_score_flow.crews.lead_response_crew.lead_response_crew import LeadResponseCrew
 from lead_score_flow.crews.lead_score_crew.lead_score_crew import LeadScoreCrew
-from lead_score_flow.types import Candidate, CandidateScore, ScoredCandidate
-from lead_score_flow.utils.candidateUtils import combine_candidates_with_scores
+from lead_score_flow.types import Candidate, CandidateScore
+from lead_score_flow.utils.cache import ScoreCache, score_cache_key
+from lead_score_flow.utils.candidateUtils import (
+    batched,
+    combine_candidates_with_scores,
+    format_candidates,
+)
+from lead_score_flow.utils.checkpoint import FlowCheckpoint, file_fingerprint
+from lead_score_flow.utils.decisions import DecisionProvider, build_decision_provider
+from lead_score_flow.utils.ingest import CandidateStore, iter_lead_batches
+from lead_score_flow.utils.pool import CrewPool
+from lead_score_flow.utils.ranking import RankTracker, boundary_candidate_ids
+from lead_score_flow.utils.scheduler import CrewScheduler
+from lead_score_flow.utils.sink import EmailSink
 
 
 class LeadScoreState(BaseModel):
-    candidates: List[Candidate] = []
-    candidate_score: List[CandidateScore] = []
-    hydrated_candidates: List[ScoredCandidate] = []
+    # One score per candidate id, tagged with the feedback round that produced it
+    candidate_score: Dict[str, CandidateScore] = {}
+    score_versions: Dict[str, int] = {}
+    top_candidate_ids: List[str] = []
     scored_leads_feedback: str = ""
+    feedback_round: int = 0
+    emailed_ids: set[str] = set()
 
 
 class LeadScoreFlow(Flow[LeadScoreState]):
     initial_state = LeadScoreState
 
+    def __init__(self, decision_provider: Optional[DecisionProvider] = None, **kwargs):
+        super().__init__(**kwargs)
+        # Decides what happens after scoring, interactive by default
+        self.decision_provider = decision_provider or build_decision_provider(
+            DECISION_POLICY, DECISION_RULES_FILE
+        )
+
+    def restore_checkpoint(self):
+        """
+        Replay the checkpoint log into state, so scored and emailed candidates are skipped.
+        """
+        for record in self.checkpoint.load():
+            if record["type"] == "score":
+                self.state.candidate_score[record["id"]] = CandidateScore(
+                    id=record["id"], score=record["score"], reason=record["reason"]
+                )
+                self.state.score_versions[record["id"]] = record["version"]
+                self.ranking.update(record["id"], record["score"])
+            elif record["type"] == "feedback":
+                self.state.scored_leads_feedback = record["feedback"]
+                self.state.feedback_round = record["round"]
+            elif record["type"] == "top":
+                self.state.top_candidate_ids = record["ids"]
+            elif record["type"] == "email":
+                self.state.emailed_ids.add(record["id"])
+
+        if self.state.candidate_score:
+            print(
+                f"Resuming from checkpoint: {len(self.state.candidate_score)} scores, "
+                f"{len(self.state.emailed_ids)} emails already done"
+            )
+
+    def drop_unknown_candidates(self):
+        """
+        Forget restored scores and emails of candidates that are not in the leads file.
+        """
+        unknown_ids = [
+            candidate_id
+            for candidate_id in self.state.candidate_score
+            if candidate_id not in self.candidates
+        ]
+        for candidate_id in unknown_ids:
+            del self.state.candidate_score[candidate_id]
+            self.state.score_versions.pop(candidate_id, None)
+            self.ranking.remove(candidate_id)
+        self.state.emailed_ids &= set(self.candidates.index)
+        if unknown_ids:
+            print(f"Ignoring {len(unknown_ids)} checkpointed candidates missing from the leads file")
+
     @start()
     def load_leads(self):
-        import csv
-        from pathlib import Path
-
-        # Get the path to leads.csv in the same directory
-        current_dir = Path(__file__).parent
-        csv_file = current_dir / "leads.csv"
+        # Leads are streamed from the CSV into a columnar store while scoring runs,
+        # so only open the batch reader here and let score_leads consume it
+        self.candidates = CandidateStore()
+        self.lead_batches = iter_lead_batches(LEADS_CSV, LOAD_BATCH_SIZE)
+        self.ranking = RankTracker(TOP_K)
+        self.score_cache = ScoreCache(
+            SCORE_CACHE_PATH,
+            max_entries=SCORE_CACHE_MAX_ENTRIES,
+            max_age=SCORE_CACHE_MAX_AGE,
+        )
 
-        candidates = []
-        with open(csv_file, mode="r", newline="", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Create a Candidate object for each row
-                print("Row:", row)
-                candidate = Candidate(**row)
-                candidates.append(candidate)
+        # Pick up where a previous, interrupted run left off
+        self.checkpoint = FlowCheckpoint(
+            CHECKPOINT_PATH,
+            source=file_fingerprint(LEADS_CSV),
+            flush_every=CHECKPOINT_FLUSH_EVERY,
+            flush_interval=CHECKPOINT_FLUSH_INTERVAL,
+        )
+        self.restore_checkpoint()
 
-        # Update the state with the loaded candidates
-        self.state.candidates = candidates
+        # Crews are built once as templates, every kickoff runs on a fresh copy
+        self.score_crews = CrewPool(lambda: LeadScoreCrew().crew(), MAX_CONCURRENT_CREWS)
+        self.batch_score_crews = CrewPool(
+            lambda: LeadBatchScoreCrew().crew(), MAX_CONCURRENT_CREWS
+        )
+        self.response_crews = CrewPool(
+            lambda: LeadResponseCrew().crew(), MAX_CONCURRENT_CREWS
+        )
 
     @listen(or_(load_leads, "scored_leads_feedback"))
     async def score_leads(self):
         print("Scoring leads")
-        tasks = []
 
-        async def score_single_candidate(candidate: Candidate):
-            result = await (
-                LeadScoreCrew()
-                .crew()
-                .kickoff_async(
+        async def score_single_candidate(candidate: Candidate) -> CandidateScore:
+            async with self.score_crews.crew() as crew:
+                result = await crew.kickoff_async(
                     inputs={
                         "candidate_id": candidate.id,
                         "name": candidate.name,
@@ -61,135 +159,284 @@ class LeadScoreFlow(Flow[LeadScoreState]):
                         "additional_instructions": self.state.scored_leads_feedback,
                     }
                 )
+            return result.pydantic
+
+        async def score_candidate_batch(batch: List[Candidate]) -> List[CandidateScore]:
+            if len(batch) == 1:
+                return [await score_single_candidate(batch[0])]
+
+            # Send K candidates in one call so the prompt and job description are paid once
+            async with self.batch_score_crews.crew() as crew:
+                result = await crew.kickoff_async(
+                    inputs={
+                        "candidates": format_candidates(batch),
+                        "job_description": JOB_DESCRIPTION,
+                        "additional_instructions": self.state.scored_leads_feedback,
+                    }
+                )
+            # An answer that didn't parse leaves every candidate of the batch missing
+            scores = (
+                {score.id: score for score in result.pydantic.scores}
+                if result.pydantic is not None
+                else {}
             )
 
-            self.state.candidate_score.append(result.pydantic)
+            # Fall back to single scoring for any candidate the batch answer left out
+            missing = [candidate for candidate in batch if candidate.id not in scores]
+            if missing:
+                print(f"Batch answer missed {len(missing)} candidates, scoring them one by one")
+            for candidate in missing:
+                await scheduler.bucket.acquire()
+                scores[candidate.id] = await score_single_candidate(candidate)
 
-        for candidate in self.state.candidates:
-            print("Scoring candidate:", candidate.name)
-            task = asyncio.create_task(score_single_candidate(candidate))
-            tasks.append(task)
+            return [scores[candidate.id] for candidate in batch]
 
-        candidate_scores = await asyncio.gather(*tasks)
-        print("Finished scoring leads: ", len(candidate_scores))
+        def cache_key(candidate: Candidate) -> str:
+            return score_cache_key(
+                candidate.bio, JOB_DESCRIPTION, self.state.scored_leads_feedback
+            )
 
-    @router(score_leads)
-    def human_in_the_loop(self):
-        print("Finding the top 3 candidates for human to review")
+        def record_score(candidate: Candidate, score: CandidateScore):
+            # Replace any score from an earlier round instead of accumulating them
+            self.state.candidate_score[candidate.id] = score
+            self.state.score_versions[candidate.id] = self.state.feedback_round
+            self.ranking.update(candidate.id, score.score)
+            self.checkpoint.record_score(candidate.id, score, self.state.feedback_round)
+
+        def unscored(candidates):
+            # Candidates restored from a checkpoint may already have a score for this round
+            for candidate in candidates:
+                if (
+                    candidate.id not in self.state.candidate_score
+                    or self.state.score_versions[candidate.id] != self.state.feedback_round
+                ):
+                    yield candidate
+
+        def cache_misses(candidates):
+            # Only candidates whose bio or instructions changed need an LLM call
+            for candidate in candidates:
+                cached = self.score_cache.get(candidate.id, cache_key(candidate))
+                if cached is not None:
+                    record_score(candidate, cached)
+                else:
+                    yield candidate
+
+        def save_scores(batch: List[Candidate], scores: List[CandidateScore]):
+            # Stream scores into state as soon as their crew finishes
+            for candidate, score in zip(batch, scores):
+                record_score(candidate, score)
+                self.score_cache.put(cache_key(candidate), score)
+
+        async def rescore_stale_top(scheduler: CrewScheduler):
+            # Candidates below the margin keep their score from an earlier round, when the
+            # new feedback lowers scores across the board they can move into the top K.
+            # Re-score every such top-K member until the whole top K is from this round.
+            attempted = set()
+            while True:
+                stale_ids = [
+                    candidate_id
+                    for candidate_id, _ in self.ranking.top()
+                    if self.state.score_versions.get(candidate_id) != self.state.feedback_round
+                ]
+                retry_ids = [id for id in stale_ids if id not in attempted]
+                if not retry_ids:
+                    if stale_ids:
+                        print(f"Could not re-score {len(stale_ids)} of the top {TOP_K} candidates")
+                    return
+                print(f"Re-scoring {len(retry_ids)} top {TOP_K} candidates scored in an earlier round")
+                attempted.update(retry_ids)
+                await scheduler.run(
+                    batched(
+                        cache_misses(self.candidates.get(id) for id in retry_ids),
+                        SCORE_BATCH_SIZE,
+                    ),
+                    score_candidate_batch,
+                    on_result=save_scores,
+                )
 
-        # Combine candidates with their scores using the helper function
-        self.state.hydrated_candidates = combine_candidates_with_scores(
-            self.state.candidates, self.state.candidate_score
+        scheduler = CrewScheduler(
+            max_concurrency=MAX_CONCURRENT_CREWS,
+            model=MODEL,
+            requests_per_minute=REQUESTS_PER_MINUTE,
+            max_retries=MAX_RETRIES,
         )
+        if self.state.feedback_round and RESCORE_MODE == "boundary":
+            # Feedback can only reshuffle candidates close to the top-K cutoff,
+            # so leave the rest of the population with their previous score
+            boundary_ids = boundary_candidate_ids(
+                self.state.candidate_score, self.ranking.cutoff(), RESCORE_MARGIN
+            )
+            print(
+                f"Re-scoring {len(boundary_ids)} of {len(self.state.candidate_score)} candidates near the top {TOP_K} cutoff"
+            )
+
+            def needs_rescore(candidate_id: str) -> bool:
+                # A candidate whose scoring failed in an earlier round has no score to keep
+                return (
+                    candidate_id in boundary_ids
+                    or candidate_id not in self.state.candidate_score
+                )
 
-        # Sort the scored candidates by their score in descending order
-        sorted_candidates = sorted(
-            self.state.hydrated_candidates, key=lambda c: c.score, reverse=True
+            if self.candidates.complete:
+                candidates = (
+                    self.candidates.get(id)
+                    for id in self.candidates.index
+                    if needs_rescore(id)
+                )
+            else:
+                # Resuming a feedback round from a checkpoint, the leads still have to be loaded
+                candidates = (
+                    candidate
+                    for candidate in self.candidates.ingest(self.lead_batches)
+                    if needs_rescore(candidate.id)
+                )
+        elif not self.candidates.complete:
+            candidates = self.candidates.ingest(self.lead_batches)
+        else:
+            candidates = iter(self.candidates)
+
+        await scheduler.run(
+            batched(cache_misses(unscored(candidates)), SCORE_BATCH_SIZE),
+            score_candidate_batch,
+            on_result=save_scores,
         )
-        self.state.hydrated_candidates = sorted_candidates
+        # Every lead has been read by now, so checkpointed ids can be checked against them
+        self.drop_unknown_candidates()
+        if self.state.feedback_round and RESCORE_MODE == "boundary":
+            await rescore_stale_top(scheduler)
+        self.score_cache.evict()
+        self.checkpoint.flush()
+        print("Finished scoring leads: ", len(self.state.candidate_score))
+        unscored_count = len(self.candidates) - len(self.state.candidate_score)
+        if unscored_count:
+            print(
+                f"{unscored_count} candidates could not be scored, they are left out of the "
+                "ranking and the emails until a later round scores them"
+            )
+        print("Score cache:", self.score_cache.report())
 
-        # Select the top 3 candidates
-        top_candidates = sorted_candidates[:3]
+    @router(score_leads)
+    async def human_in_the_loop(self):
+        print(f"Finding the top {TOP_K} candidates for human to review")
+
+        # The rank tracker already holds the top K, so only those need to be hydrated
+        self.state.top_candidate_ids = [
+            candidate_id for candidate_id, _ in self.ranking.top()
+        ]
+        top_candidates = combine_candidates_with_scores(
+            (self.candidates.get(id) for id in self.state.top_candidate_ids),
+            self.state.candidate_score,
+        )
+        self.checkpoint.record_top(self.state.top_candidate_ids)
+        self.checkpoint.flush()
 
-        print("Here are the top 3 candidates:")
+        print(f"Here are the top {TOP_K} candidates:")
         for candidate in top_candidates:
             print(
                 f"ID: {candidate.id}, Name: {candidate.name}, Score: {candidate.score}, Reason: {candidate.reason}"
             )
 
-        # Present options to the user
-        print("\nPlease choose an option:")
-        print("1. Quit")
-        print("2. Redo lead scoring with additional feedback")
-        print("3. Proceed with writing emails to all leads")
-
-        choice = input("Enter the number of your choice: ")
+        decision = await self.decision_provider.decide(
+            top_candidates, self.state.feedback_round
+        )
 
-        if choice == "1":
+        if decision.action == "quit":
+            # Nothing listens to "quit", so the flow ends here without killing the process
             print("Exiting the program.")
-            exit()
-        elif choice == "2":
-            feedback = input(
-                "\nPlease provide additional feedback on what you're looking for in candidates:\n"
+            # Quitting ends the run, the next one starts from scratch
+            self.checkpoint.clear()
+            return "quit"
+        elif decision.action == "rescore":
+            self.state.scored_leads_feedback = decision.feedback
+            self.state.feedback_round += 1
+            self.checkpoint.record_feedback(
+                self.state.scored_leads_feedback, self.state.feedback_round
             )
-            self.state.scored_leads_feedback = feedback
+            self.checkpoint.flush()
             print("\nRe-running lead scoring with your feedback...")
             return "scored_leads_feedback"
-        elif choice == "3":
+        else:
             print("\nProceeding to write emails to all leads.")
             return "generate_emails"
-        else:
-            print("\nInvalid choice. Please try again.")
-            return "human_in_the_loop"
 
     @listen("generate_emails")
     async def write_and_save_emails(self):
-        import re
-        from pathlib import Path
-
         print("Writing and saving emails for all leads.")
 
-        # Determine the top 3 candidates to proceed with
-        top_candidate_ids = {
-            candidate.id for candidate in self.state.hydrated_candidates[:3]
-        }
-
-        tasks = []
-
-        # Create the directory 'email_responses' if it doesn't exist
-        output_dir = Path(__file__).parent / "email_responses"
-        print("output_dir:", output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        async def write_email(candidate):
-            # Check if the candidate is among the top 3
-            proceed_with_candidate = candidate.id in top_candidate_ids
-
-            # Kick off the LeadResponseCrew for each candidate
-            result = await (
-                LeadResponseCrew()
-                .crew()
-                .kickoff_async(
-                    inputs={
-                        "candidate_id": candidate.id,
-                        "name": candidate.name,
-                        "bio": candidate.bio,
-                        "proceed_with_candidate": proceed_with_candidate,
-                    }
-                )
+        # Determine the top K candidates to proceed with
+        top_candidate_ids = set(self.state.top_candidate_ids)
+
+        print("output_dir:", EMAIL_OUTPUT_DIR)
+
+        def pending_candidates():
+            # Read from the store one candidate at a time, only as crews free up, and skip
+            # unscored ones and those emailed by an earlier, interrupted run
+            for candidate in self.candidates:
+                if (
+                    candidate.id in self.state.candidate_score
+                    and candidate.id not in self.state.emailed_ids
+                ):
+                    yield candidate
+
+        def mark_emailed(candidates):
+            # Only checkpoint emails once the sink has them on disk
+            self.state.emailed_ids.update(candidate.id for candidate in candidates)
+            self.checkpoint.record_emails(candidate.id for candidate in candidates)
+
+        scheduler = CrewScheduler(
+            max_concurrency=MAX_CONCURRENT_CREWS,
+            model=MODEL,
+            requests_per_minute=REQUESTS_PER_MINUTE,
+            max_retries=MAX_RETRIES,
+        )
+        async with EmailSink(
+            EMAIL_OUTPUT_DIR, mode=EMAIL_OUTPUT_MODE, on_written=mark_emailed
+        ) as sink:
+
+            async def write_email(candidate):
+                # Check if the candidate is among the top K
+                proceed_with_candidate = candidate.id in top_candidate_ids
+
+                # Kick off the LeadResponseCrew for each candidate
+                async with self.response_crews.crew() as crew:
+                    result = await crew.kickoff_async(
+                        inputs={
+                            "candidate_id": candidate.id,
+                            "name": candidate.name,
+                            "bio": candidate.bio,
+                            "proceed_with_candidate": proceed_with_candidate,
+                        }
+                    )
+
+                # Hand the email to the sink, which batches the disk writes off the event loop
+                return sink.write(candidate, result.raw)
+
+            def report_email(candidate, destination):
+                print(f"Email saved for {candidate.name} in {destination}")
+
+            # At most MAX_CONCURRENT_CREWS emails are in flight, the scheduler waits for
+            # all of them before the sink flushes and closes
+            stats = await scheduler.run(
+                pending_candidates(), write_email, on_result=report_email
             )
 
-            # Sanitize the candidate's name to create a valid filename
-            safe_name = re.sub(r"[^a-zA-Z0-9_\- ]", "", candidate.name)
-            filename = f"{safe_name}.txt"
-            print("Filename:", filename)
-
-            # Write the email content to a text file
-            file_path = output_dir / filename
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(result.raw)
-
-            # Return a message indicating the email was saved
-            return f"Email saved for {candidate.name} as {filename}"
-
-        # Create tasks for all candidates
-        for candidate in self.state.hydrated_candidates:
-            task = asyncio.create_task(write_email(candidate))
-            tasks.append(task)
+        if stats.failures:
+            # Keep the checkpoint so the next run only retries the failed emails
+            print(f"\n{len(stats.failures)} emails failed, run the flow again to retry them.")
+            return
 
-        # Run all email-writing tasks concurrently and collect results
-        email_results = await asyncio.gather(*tasks)
+        # The run is complete, so the next one starts from scratch
+        self.checkpoint.clear()
 
         # After all emails have been generated and saved
-        print("\nAll emails have been written and saved to 'email_responses' folder.")
-        for message in email_results:
-            print(message)
+        print(f"\nAll emails have been written and saved to '{EMAIL_OUTPUT_DIR}'.")
 
 
 def kickoff():
     """
     Run the flow.
     """
+    logging.basicConfig(level=LOG_LEVEL)
     lead_score_flow = LeadScoreFlow()
     lead_score_flow.kickoff()
 
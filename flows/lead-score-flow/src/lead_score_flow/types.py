@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel
 
 
@@ -21,6 +23,10 @@ class CandidateScore(BaseModel):
     reason: str
 
 
+class CandidateScoreBatch(BaseModel):
+    scores: List[CandidateScore]
+
+
 class ScoredCandidate(BaseModel):
     id: str
     name: str
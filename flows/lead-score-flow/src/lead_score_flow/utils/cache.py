@@ -0,0 +1,100 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from lead_score_flow.types import CandidateScore
+
+
+def score_cache_key(bio: str, job_description: str, feedback: str) -> str:
+    """
+    Content hash of everything that influences a candidate's score.
+    """
+    digest = hashlib.sha256()
+    for part in (bio, job_description, feedback):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ScoreCache:
+    """
+    SQLite-backed cache of candidate scores that survives process restarts.
+
+    Entries older than `max_age` seconds are ignored and removed, and once the cache
+    holds more than `max_entries` rows the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 100_000,
+        max_age: Optional[float] = None,
+        commit_every: int = 100,
+    ):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.commit_every = commit_every
+        self._pending_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                score INTEGER NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def get(self, candidate_id: str, key: str) -> Optional[CandidateScore]:
+        row = self.connection.execute(
+            "SELECT score, reason, created_at FROM scores WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        if row is None or (self.max_age is not None and now - row[2] > self.max_age):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE scores SET last_used = ? WHERE key = ?", (now, key)
+        )
+        return CandidateScore(id=candidate_id, score=row[0], reason=row[1])
+
+    def put(self, key: str, score: CandidateScore):
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO scores (key, score, reason, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, score.score, score.reason, now, now),
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_every:
+            self.connection.commit()
+            self._pending_writes = 0
+
+    def evict(self):
+        """
+        Drop expired entries and trim the cache down to `max_entries`.
+        """
+        if self.max_age is not None:
+            self.connection.execute(
+                "DELETE FROM scores WHERE created_at < ?", (time.time() - self.max_age,)
+            )
+        self.connection.execute(
+            "DELETE FROM scores WHERE key NOT IN "
+            "(SELECT key FROM scores ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        self.connection.commit()
+        self._pending_writes = 0
+
+    def report(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
@@ -1,27 +1,28 @@
-from typing import List
+import logging
+from typing import Dict, Iterable, Iterator, List, TypeVar
 
 from lead_score_flow.types import Candidate, CandidateScore, ScoredCandidate
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
 
 def combine_candidates_with_scores(
-    candidates: List[Candidate], candidate_scores: List[CandidateScore]
+    candidates: Iterable[Candidate], candidate_scores: Dict[str, CandidateScore]
 ) -> List[ScoredCandidate]:
     """
     Combine the candidates with their scores using a dictionary for efficient lookups.
     """
-    print("COMBINING CANDIDATES WITH SCORES")
-    print("SCORES:", candidate_scores)
-    print("CANDIDATES:", candidates)
-    # Create a dictionary to map score IDs to their corresponding CandidateScore objects
-    score_dict = {score.id: score for score in candidate_scores}
-    print("SCORE DICT:", score_dict)
+    logger.info("Combining candidates with scores")
 
     scored_candidates = []
     for candidate in candidates:
-        score = score_dict.get(candidate.id)
+        score = candidate_scores.get(candidate.id)
         if score:
+            # Both inputs are already validated, so skip re-validating every field
             scored_candidates.append(
-                ScoredCandidate(
+                ScoredCandidate.model_construct(
                     id=candidate.id,
                     name=candidate.name,
                     email=candidate.email,
@@ -32,5 +33,31 @@ def combine_candidates_with_scores(
                 )
             )
 
-    print("SCORED CANDIDATES:", scored_candidates)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Scored candidates: %s", scored_candidates)
+    logger.info("Combined %d scored candidates", len(scored_candidates))
     return scored_candidates
+
+
+def format_candidates(candidates: Iterable[Candidate]) -> str:
+    """
+    Render several candidates as one prompt block for batched scoring.
+    """
+    return "\n\n".join(
+        f"Candidate ID: {candidate.id}\nName: {candidate.name}\nBio:\n{candidate.bio}"
+        for candidate in candidates
+    )
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    Group items into lists of `size`, pulling from the input lazily.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
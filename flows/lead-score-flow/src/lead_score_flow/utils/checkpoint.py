@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from lead_score_flow.types import CandidateScore
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Identifies a version of a file by its path, size and modification time, without reading it.
+    """
+    stat = path.stat()
+    return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class FlowCheckpoint:
+    """
+    Append-only JSONL log of flow progress.
+
+    Every state change (a score, a feedback round, the chosen top candidates, a saved
+    email) is one small record, so checkpointing never re-serializes the whole state.
+    Records are buffered and flushed every `flush_every` records or `flush_interval`
+    seconds, whichever comes first. Replaying the log in order rebuilds the state.
+
+    The log starts with a `source` record, such as the fingerprint of the leads file. A log
+    written for another source is discarded instead of replayed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        source: Optional[str] = None,
+        flush_every: int = 100,
+        flush_interval: float = 5.0,
+    ):
+        self.path = path
+        self.source = source
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._terminate_partial_record()
+
+    def load(self) -> Iterator[dict]:
+        records = self._read()
+        first = next(records, None)
+        if first is None:
+            return
+        if first.get("type") != "source" or first.get("source") != self.source:
+            print("Checkpoint was written for a different leads file, starting from scratch")
+            records.close()
+            self.clear()
+            return
+        yield from records
+
+    def _read(self) -> Iterator[dict]:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line behind
+                    print("Skipping truncated checkpoint record")
+
+    def record_score(self, candidate_id: str, score: CandidateScore, version: int):
+        self._append(
+            {
+                "type": "score",
+                "id": candidate_id,
+                "score": score.score,
+                "reason": score.reason,
+                "version": version,
+            }
+        )
+
+    def record_feedback(self, feedback: str, feedback_round: int):
+        self._append({"type": "feedback", "feedback": feedback, "round": feedback_round})
+
+    def record_top(self, candidate_ids: List[str]):
+        self._append({"type": "top", "ids": candidate_ids})
+
+    def record_emails(self, candidate_ids: Iterable[str]):
+        for candidate_id in candidate_ids:
+            self._append({"type": "email", "id": candidate_id})
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(self._buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def clear(self):
+        """
+        Forget all progress, used once the flow has run to completion or was quit.
+        """
+        self._buffer = []
+        self.path.unlink(missing_ok=True)
+
+    def _terminate_partial_record(self):
+        # Make sure new records never get glued onto a line a crash left unfinished
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _append(self, record: dict):
+        if not self._buffer and (not self.path.exists() or self.path.stat().st_size == 0):
+            # A new log, say which source it belongs to before anything else
+            self._buffer.append(json.dumps({"type": "source", "source": self.source}) + "\n")
+        self._buffer.append(json.dumps(record) + "\n")
+        if (
+            len(self._buffer) >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import sys
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+from lead_score_flow.types import ScoredCandidate
+
+
+class Decision(BaseModel):
+    action: Literal["quit", "rescore", "proceed"]
+    feedback: str = ""
+
+
+class DecisionProvider(ABC):
+    """
+    Decides what the flow does after scoring: quit, re-score with feedback or proceed to emails.
+    """
+
+    @abstractmethod
+    async def decide(
+        self, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        ...
+
+
+class InteractiveDecisionProvider(DecisionProvider):
+    """
+    Asks a human on the terminal. input() runs on a worker thread so the event loop stays free.
+    """
+
+    async def decide(
+        self, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        while True:
+            # Present options to the user
+            print("\nPlease choose an option:")
+            print("1. Quit")
+            print("2. Redo lead scoring with additional feedback")
+            print("3. Proceed with writing emails to all leads")
+
+            choice = await asyncio.to_thread(input, "Enter the number of your choice: ")
+
+            if choice == "1":
+                return Decision(action="quit")
+            elif choice == "2":
+                feedback = await asyncio.to_thread(
+                    input,
+                    "\nPlease provide additional feedback on what you're looking for in candidates:\n",
+                )
+                return Decision(action="rescore", feedback=feedback)
+            elif choice == "3":
+                return Decision(action="proceed")
+            else:
+                print("\nInvalid choice. Please try again.")
+
+
+class QueueDecisionProvider(DecisionProvider):
+    """
+    Hands the top candidates to an external reviewer, such as a web UI, and waits for its answer.
+
+    The reviewer reads from `requests` and replies by putting a `Decision` on `decisions`,
+    so the provider has to be passed to `LeadScoreFlow(decision_provider=...)` by the code
+    that runs the reviewer.
+    """
+
+    def __init__(self):
+        self.requests: asyncio.Queue = asyncio.Queue()
+        self.decisions: asyncio.Queue = asyncio.Queue()
+
+    async def decide(
+        self, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        await self.requests.put(
+            {"top_candidates": top_candidates, "feedback_round": feedback_round}
+        )
+        return await self.decisions.get()
+
+
+class RuleDecisionProvider(DecisionProvider):
+    """
+    Decides headlessly from a JSON rule file, for example:
+
+        {
+            "proceed_min_score": 80,
+            "feedback": "Prioritize candidates with production Next.js experience",
+            "max_feedback_rounds": 2,
+            "review_below": 40,
+            "otherwise": "proceed",
+            "headless_review": "quit"
+        }
+
+    - proceed when every top candidate scores at least `proceed_min_score`
+    - otherwise re-score with `feedback` until `max_feedback_rounds` is reached
+    - after that apply `otherwise`: "proceed", "quit" or "review"
+    - when even the best candidate scores below `review_below`, ask for review
+
+    Review is delegated to `review_provider`, so the flow only pauses when a rule asks for it.
+    Without one, review is asked on the terminal, or when stdin isn't a terminal (a headless
+    pipeline) `headless_review` is applied instead: "quit" (the default) or "proceed".
+    """
+
+    def __init__(self, rules: dict, review_provider: Optional[DecisionProvider] = None):
+        self.rules = rules
+        self.review_provider = review_provider
+
+    @classmethod
+    def from_file(
+        cls, path: Path, review_provider: Optional[DecisionProvider] = None
+    ) -> "RuleDecisionProvider":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), review_provider)
+
+    async def decide(
+        self, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        otherwise = self.rules.get("otherwise", "proceed")
+        scores = [candidate.score for candidate in top_candidates]
+        if not scores:
+            return await self._apply(otherwise, top_candidates, feedback_round)
+
+        review_below = self.rules.get("review_below")
+        if review_below is not None and max(scores) < review_below:
+            print(f"Best score {max(scores)} is below {review_below}, asking for review")
+            return await self._review(top_candidates, feedback_round)
+
+        if min(scores) >= self.rules.get("proceed_min_score", 0):
+            return Decision(action="proceed")
+
+        feedback = self.rules.get("feedback")
+        if feedback and feedback_round < self.rules.get("max_feedback_rounds", 1):
+            return Decision(action="rescore", feedback=feedback)
+
+        return await self._apply(otherwise, top_candidates, feedback_round)
+
+    async def _apply(
+        self, action: str, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        if action == "review":
+            return await self._review(top_candidates, feedback_round)
+        return Decision(action=action)
+
+    async def _review(
+        self, top_candidates: List[ScoredCandidate], feedback_round: int
+    ) -> Decision:
+        if self.review_provider is not None:
+            return await self.review_provider.decide(top_candidates, feedback_round)
+        if sys.stdin is not None and sys.stdin.isatty():
+            return await InteractiveDecisionProvider().decide(top_candidates, feedback_round)
+
+        action = self.rules.get("headless_review", "quit")
+        if action not in ("quit", "proceed"):
+            raise ValueError(
+                f"Unknown headless_review {action!r}, expected 'quit' or 'proceed'"
+            )
+        print(f"No terminal to ask for review on, applying headless_review: {action}")
+        return Decision(action=action)
+
+
+def build_decision_provider(policy: str, rules_file: Path) -> DecisionProvider:
+    if policy == "interactive":
+        return InteractiveDecisionProvider()
+    if policy == "rules":
+        return RuleDecisionProvider.from_file(rules_file)
+    if policy == "queue":
+        # Nothing could feed a queue built here, the flow would wait forever
+        raise ValueError(
+            "The 'queue' decision policy needs a QueueDecisionProvider shared with its reviewer, "
+            "pass one as LeadScoreFlow(decision_provider=...)"
+        )
+    raise ValueError(
+        f"Unknown decision policy {policy!r}, expected 'interactive' or 'rules'"
+    )
@@ -0,0 +1,75 @@
+import csv
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+from lead_score_flow.types import Candidate
+
+CANDIDATE_FIELDS = ("id", "name", "email", "bio", "skills")
+
+
+def iter_lead_batches(csv_file: Path, batch_size: int = 500) -> Iterator[List[dict]]:
+    """
+    Stream rows from the leads CSV in batches so large exports are never held in memory at once.
+    """
+    with open(csv_file, mode="r", newline="", encoding="utf-8") as file:
+        batch = []
+        for row in csv.DictReader(file):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class CandidateStore:
+    """
+    Columnar candidate storage keyed by candidate id.
+
+    Each field is kept in its own list instead of one pydantic model per row;
+    `Candidate` objects are only built on demand when a row is read.
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, List[str]] = {field: [] for field in CANDIDATE_FIELDS}
+        self.index: Dict[str, int] = {}
+        self.complete = False
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return candidate_id in self.index
+
+    def __iter__(self) -> Iterator[Candidate]:
+        for row in range(len(self.columns["id"])):
+            yield self._candidate(row)
+
+    def get(self, candidate_id: str) -> Candidate:
+        return self._candidate(self.index[candidate_id])
+
+    def add(self, row: dict) -> Candidate:
+        candidate_id = row["id"]
+        if candidate_id in self.index:
+            position = self.index[candidate_id]
+            for field in CANDIDATE_FIELDS:
+                self.columns[field][position] = row[field]
+        else:
+            self.index[candidate_id] = len(self.columns["id"])
+            for field in CANDIDATE_FIELDS:
+                self.columns[field].append(row[field])
+        return self._candidate(self.index[candidate_id])
+
+    def ingest(self, batches: Iterable[List[dict]]) -> Iterator[Candidate]:
+        """
+        Add each batch to the store and yield its candidates right away, so a consumer
+        can start working on the first rows while the rest of the file is still being read.
+        """
+        for batch in batches:
+            for row in batch:
+                yield self.add(row)
+            print("Loaded leads:", len(self))
+        self.complete = True
+
+    def _candidate(self, row: int) -> Candidate:
+        return Candidate(**{field: self.columns[field][row] for field in CANDIDATE_FIELDS})
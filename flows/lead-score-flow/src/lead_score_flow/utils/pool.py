@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from crewai import Crew
+
+
+class CrewPool:
+    """
+    Crews for concurrent kickoffs, copied from a single template.
+
+    The template is built once, which parses agents.yaml/tasks.yaml and creates the
+    agents. A kickoff leaves its task outputs, usage metrics and agent state on the
+    crew, so like `Crew.kickoff_for_each` every checkout gets a fresh copy of the
+    template and the template itself is never kicked off. Copies share the template
+    agents' LLM clients, and at most `size` are checked out at a time.
+    """
+
+    def __init__(self, crew_factory: Callable[[], Crew], size: int):
+        self.crew_factory = crew_factory
+        self.size = size
+        self._template: Optional[Crew] = None
+        self._available = asyncio.Semaphore(size)
+
+    @asynccontextmanager
+    async def crew(self) -> AsyncIterator[Crew]:
+        async with self._available:
+            yield self._new_crew()
+
+    def _new_crew(self) -> Crew:
+        if self._template is None:
+            self._template = self.crew_factory()
+
+        crew = self._template.copy()
+        for agent, template_agent in zip(crew.agents, self._template.agents):
+            agent.llm = template_agent.llm
+        return crew
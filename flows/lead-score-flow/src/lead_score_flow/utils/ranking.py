@@ -0,0 +1,88 @@
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+from lead_score_flow.types import CandidateScore
+
+
+class RankTracker:
+    """
+    Keeps the top K candidate ids up to date as scores stream in.
+
+    A min-heap of size K holds the current leaders, so each new score costs O(log K).
+    Only when a candidate already in the top K is re-scored is the heap rebuilt,
+    and that is deferred until the ranking is next read.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._members: Set[str] = set()
+        self._stale = False
+
+    def update(self, candidate_id: str, score: int):
+        self.scores[candidate_id] = score
+        if self._stale:
+            return
+        if candidate_id in self._members:
+            self._stale = True
+        elif len(self._heap) < self.k:
+            heapq.heappush(self._heap, (score, candidate_id))
+            self._members.add(candidate_id)
+        elif score > self._heap[0][0]:
+            _, evicted_id = heapq.heapreplace(self._heap, (score, candidate_id))
+            self._members.discard(evicted_id)
+            self._members.add(candidate_id)
+
+    def remove(self, candidate_id: str):
+        if self.scores.pop(candidate_id, None) is not None and candidate_id in self._members:
+            self._stale = True
+
+    def top(self) -> List[Tuple[str, int]]:
+        """
+        Current top K as (candidate id, score) pairs, best first.
+        """
+        self._rebuild_if_stale()
+        return [
+            (candidate_id, score)
+            for score, candidate_id in sorted(self._heap, reverse=True)
+        ]
+
+    def cutoff(self) -> Optional[int]:
+        """
+        Score of the K-th best candidate, or None until K candidates have been scored.
+        """
+        self._rebuild_if_stale()
+        if len(self._heap) < self.k:
+            return None
+        return self._heap[0][0]
+
+    def _rebuild_if_stale(self):
+        if not self._stale:
+            return
+        self._heap = [
+            (score, candidate_id)
+            for candidate_id, score in heapq.nlargest(
+                self.k, self.scores.items(), key=lambda item: item[1]
+            )
+        ]
+        heapq.heapify(self._heap)
+        self._members = {candidate_id for _, candidate_id in self._heap}
+        self._stale = False
+
+
+def boundary_candidate_ids(
+    candidate_scores: Dict[str, CandidateScore], cutoff: Optional[int], margin: int
+) -> Set[str]:
+    """
+    Ids of the candidates whose place in the top K could change: everyone scoring at
+    or above the K-th best score minus `margin`.
+    """
+    if cutoff is None:
+        return set(candidate_scores)
+
+    return {
+        candidate_id
+        for candidate_id, score in candidate_scores.items()
+        if score.score >= cutoff - margin
+    }
@@ -0,0 +1,163 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter allowing `rate` requests per second with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# One bucket per model so every scheduler in the process shares the provider budget
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(model: str, requests_per_minute: int) -> TokenBucket:
+    """
+    Return the shared token bucket for a model, creating it on first use.
+    """
+    if model not in _buckets:
+        _buckets[model] = TokenBucket(
+            rate=requests_per_minute / 60, capacity=max(1, requests_per_minute // 6)
+        )
+    return _buckets[model]
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Detect provider rate limit (HTTP 429) errors without depending on a specific client library.
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429 or "RateLimit" in type(error).__name__
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.completed = 0
+        self.retries = 0
+        self.failures: List[Tuple[Any, Exception]] = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed items per minute."""
+        return self.completed / self.elapsed * 60 if self.elapsed else 0.0
+
+    def report(self) -> str:
+        return (
+            f"{self.completed}/{self.submitted} done, {len(self.failures)} failed, "
+            f"{self.retries} retries, {self.elapsed:.1f}s elapsed, "
+            f"{self.throughput:.1f} items/min"
+        )
+
+
+class CrewScheduler:
+    """
+    Runs crew kickoffs with a cap on in-flight crews, a per-model token bucket and
+    exponential backoff on rate limit errors.
+
+    Items are pulled from the input iterable only when a slot frees up, so large
+    (or lazily produced) inputs are never materialized as tasks all at once.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        model: str = "default",
+        requests_per_minute: int = 60,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        report_every: int = 50,
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = get_bucket(model, requests_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.report_every = report_every
+
+    async def run(
+        self,
+        items: Iterable[Any],
+        worker: Callable[[Any], Awaitable[Any]],
+        on_result: Optional[Callable[[Any, Any], None]] = None,
+    ) -> SchedulerStats:
+        """
+        Call `worker(item)` for every item and hand each result to `on_result(item, result)`
+        as soon as it finishes.
+        """
+        stats = SchedulerStats()
+        slots = asyncio.Semaphore(self.max_concurrency)
+        in_flight = set()
+
+        def release(task):
+            in_flight.discard(task)
+            slots.release()
+
+        try:
+            for item in items:
+                await slots.acquire()
+                stats.submitted += 1
+                task = asyncio.create_task(self._run_one(item, worker, on_result, stats))
+                in_flight.add(task)
+                task.add_done_callback(release)
+        finally:
+            # Even when the input or the caller fails, no task outlives the run
+            if in_flight:
+                await asyncio.gather(*in_flight)
+
+        print("Scheduler finished:", stats.report())
+        for item, error in stats.failures:
+            print(f"Failed item {item!r}: {error}")
+        return stats
+
+    async def _run_one(self, item, worker, on_result, stats: SchedulerStats):
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                result = await worker(item)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    stats.failures.append((item, e))
+                    return
+                stats.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                continue
+
+            stats.completed += 1
+            if on_result is not None:
+                on_result(item, result)
+            if self.report_every and stats.completed % self.report_every == 0:
+                print("Scheduler progress:", stats.report())
+            return
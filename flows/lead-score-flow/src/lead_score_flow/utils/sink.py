@@ -0,0 +1,134 @@
+import asyncio
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from lead_score_flow.types import Candidate
+
+EMAIL_OUTPUT_MODES = ("files", "jsonl", "sqlite")
+
+
+def email_filename(candidate: Candidate) -> str:
+    """
+    Unique filename for a candidate's email, the id keeps similar names from colliding.
+    """
+    safe_id = re.sub(r"[^a-zA-Z0-9_\-]", "", candidate.id)
+    safe_name = re.sub(r"[^a-zA-Z0-9_\- ]", "", candidate.name)
+    return f"{safe_id}_{safe_name}.txt"
+
+
+class EmailSink:
+    """
+    Collects generated emails and writes them in batches on a worker thread so the
+    event loop never blocks on disk I/O.
+
+    Modes:
+    - "files": one `<id>_<name>.txt` file per candidate
+    - "jsonl": appends every email to a single `emails.jsonl` archive
+    - "sqlite": inserts every email into a single `emails.sqlite3` archive
+
+    `on_written` is called on the event loop with the candidates of each batch once it is on disk.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        mode: str = "files",
+        batch_size: int = 50,
+        on_written: Optional[Callable[[List[Candidate]], None]] = None,
+    ):
+        if mode not in EMAIL_OUTPUT_MODES:
+            raise ValueError(
+                f"Unknown email output mode {mode!r}, expected one of {EMAIL_OUTPUT_MODES}"
+            )
+        self.output_dir = output_dir
+        self.mode = mode
+        self.batch_size = batch_size
+        self.on_written = on_written
+        self.written = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer: Optional[asyncio.Task] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._closed = False
+
+    async def __aenter__(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.mode == "sqlite":
+            self._connection = sqlite3.connect(
+                self.output_dir / "emails.sqlite3", check_same_thread=False
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS emails "
+                "(candidate_id TEXT PRIMARY KEY, name TEXT, email TEXT, content TEXT)"
+            )
+        self._writer = asyncio.create_task(self._drain())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Emails queued after the shutdown sentinel would never be written
+        self._closed = True
+        await self._queue.put(None)
+        await self._writer
+        if self._connection is not None:
+            self._connection.close()
+
+    def write(self, candidate: Candidate, content: str) -> str:
+        """
+        Queue an email for writing and return where it will be stored.
+        """
+        if self._closed:
+            raise RuntimeError("EmailSink is closed, the email would not be written")
+        self._queue.put_nowait((candidate, content))
+        if self.mode == "files":
+            return email_filename(candidate)
+        if self.mode == "jsonl":
+            return "emails.jsonl"
+        return "emails.sqlite3"
+
+    async def _drain(self):
+        done = False
+        while not done:
+            batch = []
+            item = await self._queue.get()
+            # The sentinel ends the batch it is found in, wherever that is
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            done = item is None
+            if batch:
+                await asyncio.to_thread(self._write_batch, batch)
+                self.written += len(batch)
+                if self.on_written is not None:
+                    self.on_written([candidate for candidate, _ in batch])
+
+    def _write_batch(self, batch: List[Tuple[Candidate, str]]):
+        if self.mode == "files":
+            for candidate, content in batch:
+                with open(
+                    self.output_dir / email_filename(candidate), "w", encoding="utf-8"
+                ) as f:
+                    f.write(content)
+        elif self.mode == "jsonl":
+            with open(self.output_dir / "emails.jsonl", "a", encoding="utf-8") as f:
+                for candidate, content in batch:
+                    record = {
+                        "candidate_id": candidate.id,
+                        "name": candidate.name,
+                        "email": candidate.email,
+                        "content": content,
+                    }
+                    f.write(json.dumps(record) + "\n")
+        else:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO emails (candidate_id, name, email, content) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (candidate.id, candidate.name, candidate.email, content)
+                    for candidate, content in batch
+                ],
+            )
+            self._connection.commit()